@@ -0,0 +1,168 @@
+import argparse
+import fnmatch
+import glob
+import multiprocessing
+import os
+
+from restaurant import DEFAULT_APPROACHES
+from simulator import Simulator, result_rows
+
+# The names of the report files the simulators write, which sit next to the
+# scenarios but are not scenarios themselves
+REPORT_PATTERNS = ("report*.txt", "*_output.txt", "*_report.txt")
+
+
+def find_scenarios(patterns):
+    """Return the scenario file names matched by patterns, sorted.
+
+    Each pattern is either a folder, meaning every .txt file in it, or a
+    glob pattern such as "scenarios/*.txt". Files named like reports, as
+    given by REPORT_PATTERNS, are left out.
+
+    :type patterns: List[str]
+    :rtype: List[str]
+    """
+    scenario_file_names = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*.txt")
+        scenario_file_names.update(name for name in glob.glob(pattern)
+                                   if os.path.isfile(name) and
+                                   not _is_report(name))
+    return sorted(scenario_file_names)
+
+
+def _is_report(file_name):
+    """Return whether file_name is named like a report file.
+
+    :type file_name: str
+    :rtype: bool
+
+    >>> _is_report("a1/test2_output.txt"), _is_report("a1/test2.txt")
+    (True, False)
+    """
+    base_name = os.path.basename(file_name)
+    return any(fnmatch.fnmatch(base_name, pattern)
+               for pattern in REPORT_PATTERNS)
+
+
+def report_name_for(scenario_file_name, report_folder):
+    """Return the name of the report file for scenario_file_name.
+
+    :type scenario_file_name: str
+    :type report_folder: str
+    :rtype: str
+
+    >>> report_name_for("scenarios/scenario1.txt", "out")
+    'out/scenario1_report.txt'
+    """
+    stem = os.path.splitext(os.path.basename(scenario_file_name))[0]
+    return os.path.join(report_folder, stem + "_report.txt")
+
+
+def simulate_scenario(scenario_file_name, report_folder, event_driven=True,
+                      purge_expired=False):
+    """Simulate every approach on one scenario and write its report.
+
+    Return one (approach name, total profit, customers served, customers
+    unserved) row for each approach, in report order, and None; or, if the
+    scenario could not be read or simulated, no rows and the error. No
+    report is left for a failed scenario.
+
+    The scenario is parsed in columns before the simulation starts, so a
+    malformed line is reported with its line number, and blank lines are
+    skipped.
+
+    :type scenario_file_name: str
+    :type report_folder: str
+    :type event_driven: bool
+    :type purge_expired: bool
+    :rtype: (List[(str, float, int, int)], str | None)
+    """
+    approaches = [approach_class(purge_expired)
+                  for approach_class in DEFAULT_APPROACHES]
+    report_file_name = report_name_for(scenario_file_name, report_folder)
+    simulator = Simulator(approaches)
+    try:
+        simulator.load_scenario(scenario_file_name, columnar=True)
+        simulator.simulate(report_file_name, event_driven)
+    except (OSError, ValueError) as error:
+        if os.path.exists(report_file_name):
+            os.remove(report_file_name)
+        return [], "{}: {}".format(type(error).__name__, error)
+    return result_rows(approaches), None
+
+
+def run_batch(scenario_file_names, report_folder, summary_file_name,
+              processes=None, event_driven=True, purge_expired=False):
+    """Simulate many scenarios across a pool of worker processes.
+
+    The report of each scenario is written in report_folder, and a summary
+    table with the profit, customers served and customers unserved of each
+    approach on each scenario is written to summary_file_name as tab
+    separated values. A scenario that fails does not stop the others: it
+    gets one row in the summary, with the error in its last column.
+
+    :param scenario_file_names: The scenario files to simulate
+    :type scenario_file_names: List[str]
+    :param report_folder: The folder the per-scenario reports are written in
+    :type report_folder: str
+    :param summary_file_name: Name of the summary table file
+    :type summary_file_name: str
+    :param processes: The number of worker processes, by default one per CPU
+    :type processes: int | None
+    :type event_driven: bool
+    :param purge_expired: Whether the approaches drop waiting customers
+        once their patience runs out
+    :type purge_expired: bool
+    :rtype: None
+    """
+    os.makedirs(report_folder, exist_ok=True)
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(simulate_scenario,
+                               [(name, report_folder, event_driven,
+                                 purge_expired)
+                                for name in scenario_file_names],
+                               chunksize=1)
+
+    with open(summary_file_name, "w") as summary_file:
+        summary_file.write(
+            "scenario\tapproach\tprofit\tserved\tunserved\terror\n")
+        for name, (rows, error) in zip(scenario_file_names, results):
+            if error is not None:
+                summary_file.write("{}\t\t\t\t\t{}\n".format(
+                    name, error.replace("\t", " ").replace("\n", " ")))
+            for approach_name, profit, served, unserved in rows:
+                summary_file.write("{}\t{}\t{}\t{}\t{}\t\n".format(
+                    name, approach_name, profit, served, unserved))
+
+
+def main(arguments=None):
+    """Run the batch simulator from the command line.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulate every restaurant approach on many scenarios.")
+    parser.add_argument("scenarios", nargs="+",
+                        help="scenario folders or glob patterns")
+    parser.add_argument("-o", "--reports", default="reports",
+                        help="folder to write the scenario reports in")
+    parser.add_argument("-s", "--summary", default="summary.tsv",
+                        help="file to write the summary table to")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("--turn-by-turn", action="store_true",
+                        help="process every turn instead of only events")
+    parser.add_argument("--purge-expired", action="store_true",
+                        help="drop waiting customers out of patience")
+    options = parser.parse_args(arguments)
+
+    run_batch(find_scenarios(options.scenarios), options.reports,
+              options.summary, options.processes, not options.turn_by_turn,
+              options.purge_expired)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+
+from restaurant import DEFAULT_APPROACHES
+from scenario import read_scenario, convert_scenario, map_scenario
+from simulator import TurnEngine, read_customers
+from synthesizer import draw, synthesize, write_synthesized
+
+# The ways a benchmark can load its scenario, by name
+LOADERS = {
+    "text": lambda name: list(read_customers(name)),
+    "columnar": read_scenario,
+    "binary": map_scenario,
+}
+
+
+def generate_scenario(scenario_file_name, customers, seed=0, arrival_rate=1.0,
+                      profit=("uniform", 1, 20),
+                      prepare_time=("integers", 1, 10),
+                      patience=("integers", 1, 20)):
+    """Write a random scenario of customers to scenario_file_name.
+
+    Customers arrive as a Poisson process with arrival_rate customers per
+    turn on average, starting at turn 1. Profits are rounded to cents and
+    prepare times and patiences to whole turns. The same seed always gives
+    the same scenario. The scenario is drawn by
+    synthesizer.synthesize_chunks.
+
+    :param scenario_file_name: Name of the scenario file to write
+    :type scenario_file_name: str
+    :param customers: The number of customers
+    :type customers: int
+    :type seed: int
+    :type arrival_rate: float
+    :param profit: The distribution of profits, as for draw
+    :type profit: tuple
+    :param prepare_time: The distribution of prepare times, as for draw
+    :type prepare_time: tuple
+    :param patience: The distribution of patiences, as for draw
+    :type patience: tuple
+    :rtype: None
+    """
+    write_synthesized(scenario_file_name, customers, seed,
+                      arrival_rate=arrival_rate, profit=profit,
+                      prepare_time=prepare_time, patience=patience)
+
+
+def generate_customers(customers, seed=0, arrival_rate=1.0,
+                       profit=("uniform", 1, 20),
+                       prepare_time=("integers", 1, 10),
+                       patience=("integers", 1, 20)):
+    """Return a random scenario of customers, without writing any file.
+
+    The scenario is the one generate_scenario writes with the same
+    arguments.
+
+    :type customers: int
+    :type seed: int
+    :type arrival_rate: float
+    :type profit: tuple
+    :type prepare_time: tuple
+    :type patience: tuple
+    :rtype: Scenario
+
+    >>> len(generate_customers(5, seed=1))
+    5
+    """
+    return synthesize(customers, seed, arrival_rate=arrival_rate,
+                      profit=profit, prepare_time=prepare_time,
+                      patience=patience)
+
+
+def time_approach(approach_class, scenario_file_name, loader="columnar",
+                  event_driven=True):
+    """Simulate one approach on a scenario file and time each step.
+
+    Return a dictionary with the seconds spent loading the scenario,
+    simulating it and writing the report, and the results of the approach.
+
+    :type approach_class: type
+    :type scenario_file_name: str
+    :param loader: The name of a loader in LOADERS
+    :type loader: str
+    :type event_driven: bool
+    :rtype: dict
+    """
+    start = time.perf_counter()
+    scenario = LOADERS[loader](scenario_file_name)
+    loaded = time.perf_counter()
+
+    approach = approach_class()
+    engine = TurnEngine([approach], event_driven)
+    for next_customer in scenario:
+        engine.add_customer(next_customer)
+    engine.finish()
+    simulated = time.perf_counter()
+
+    with open(os.devnull, "w") as report_file:
+        approach.write_report(report_file)
+    reported = time.perf_counter()
+
+    return {"approach": approach_class.__name__,
+            "loader": loader,
+            "event_driven": event_driven,
+            "load_seconds": loaded - start,
+            "simulate_seconds": simulated - loaded,
+            "report_seconds": reported - simulated,
+            "profit": approach.total_profit(),
+            "served": approach.number_served()}
+
+
+def run_benchmark(sizes, seed=0, loaders=("columnar",), event_driven=True,
+                  **distributions):
+    """Benchmark every approach on generated scenarios of the given sizes.
+
+    Return one result dictionary per size, loader and approach. Each one
+    holds the timings of time_approach along with the scenario size, the
+    seed and the Python version, so that runs can be compared over time.
+
+    :param sizes: The numbers of customers of the generated scenarios
+    :type sizes: List[int]
+    :type seed: int
+    :param loaders: The names of the loaders in LOADERS to benchmark
+    :type loaders: List[str]
+    :type event_driven: bool
+    :param distributions: Passed on to generate_scenario
+    :rtype: List[dict]
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            text_name = os.path.join(folder, "{}.txt".format(size))
+            generate_scenario(text_name, size, seed, **distributions)
+            binary_name = os.path.join(folder, "{}.scn".format(size))
+            if "binary" in loaders:
+                convert_scenario(text_name, binary_name)
+            for loader in loaders:
+                name = binary_name if loader == "binary" else text_name
+                for approach_class in DEFAULT_APPROACHES:
+                    result = time_approach(approach_class, name, loader,
+                                           event_driven)
+                    result.update(customers=size, seed=seed,
+                                  python=platform.python_version())
+                    results.append(result)
+    return results
+
+
+def main(arguments=None):
+    """Run the benchmark from the command line and write JSON results.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the restaurant approaches.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10 ** 3, 10 ** 4, 10 ** 5],
+                        help="numbers of customers to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--arrival-rate", type=float, default=1.0,
+                        help="average customers per turn")
+    parser.add_argument("--loaders", nargs="+", default=["columnar"],
+                        choices=sorted(LOADERS))
+    parser.add_argument("--turn-by-turn", action="store_true",
+                        help="process every turn instead of only events")
+    parser.add_argument("-o", "--output", default=None,
+                        help="file to write the JSON results to")
+    options = parser.parse_args(arguments)
+
+    results = run_benchmark(options.sizes, options.seed, options.loaders,
+                            not options.turn_by_turn,
+                            arrival_rate=options.arrival_rate)
+    text = json.dumps(results, indent=1)
+    if options.output is None:
+        print(text)
+    else:
+        with open(options.output, "w") as output_file:
+            output_file.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import itertools
+import zlib
+
+from restaurant import DEFAULT_APPROACHES
+from simulator import TurnEngine, load_customers, extend_scenario
+
+
+def round_robin(branch_count):
+    """Return a routing rule sending customers to each of branch_count
+    branches in turn.
+
+    :type branch_count: int
+    :rtype: Callable[[Customer], int]
+
+    >>> from customer import Customer
+    >>> route = round_robin(2)
+    >>> [route(Customer("1\\t{}\\t5\\t2\\t9".format(n))) for n in range(3)]
+    [0, 1, 0]
+    """
+    branches = itertools.cycle(range(branch_count))
+    return lambda customer: next(branches)
+
+
+def by_id(branch_count):
+    """Return a routing rule sending each customer to one of branch_count
+    branches by a hash of their id, so a customer always goes to the same
+    branch whatever the other customers.
+
+    :type branch_count: int
+    :rtype: Callable[[Customer], int]
+
+    >>> from customer import Customer
+    >>> route = by_id(3)
+    >>> customer = Customer("1\\t42\\t5\\t2\\t9")
+    >>> route(customer) == route(customer)
+    True
+    """
+    return lambda customer: zlib.crc32(customer.id().encode()) % branch_count
+
+
+# The routing rules that can be chosen from the command line, by name
+ROUTES = {"round-robin": round_robin, "by-id": by_id}
+
+
+class BranchSimulator:
+    """A BranchSimulator.
+
+    This class simulates a chain of restaurant branches on one scenario.
+    Each customer of the scenario is sent to one branch by a routing rule,
+    a function of the customer returning the number of their branch. Each
+    branch runs its own approaches, which only see the customers sent to
+    that branch, and give the same results as simulating those customers
+    alone.
+
+    The scenario is loaded once, as by Simulator.load_scenario, and all
+    branches advance together in one pass over its customers, so a
+    streamed scenario can be simulated too.
+    """
+
+    # === Private Attributes ===
+    # :type _branches: List[List[Restaurant]]
+    #   The approaches of each branch, in report order
+    # :type _route: Callable[[Customer], int] | None
+    #   The routing rule, giving the number of the branch of a customer, or
+    #   None for a new round robin on each simulation
+    # :type _scenario: List[Customer] | Scenario | Iterator[Customer]
+    #   The customers of the scenario loaded, in order
+
+    def __init__(self, branches, route=None):
+        """Initialize a BranchSimulator of branches.
+
+        :param branches: The approaches of each branch, in report order
+        :type branches: List[List[Restaurant]]
+        :param route: The routing rule, by default a round robin starting
+            from the first branch on each simulation. A routing rule with
+            state of its own, such as round_robin returns, keeps it from
+            one simulation to the next.
+        :type route: Callable[[Customer], int] | None
+        """
+        self._branches = [list(approaches) for approaches in branches]
+        self._route = route
+        self._scenario = []
+
+    def load_scenario(self, scenario_file_name, streaming=False,
+                      columnar=False, cache=None):
+        """Load a scenario from scenario_file_name, as
+        Simulator.load_scenario does.
+
+        :type scenario_file_name: str
+        :type streaming: bool
+        :type columnar: bool
+        :type cache: ScenarioCache | None
+        :rtype: None
+        """
+        self._scenario = extend_scenario(
+            self._scenario, load_customers(scenario_file_name, streaming,
+                                           columnar, cache))
+
+    def simulate(self, report_file_name, event_driven=False):
+        """Run the simulation of every branch and write the results in
+        report_file_name.
+
+        The report holds the report of each branch in turn, under a line
+        naming the branch.
+
+        :type report_file_name: str
+        :param event_driven: Whether to skip the turns in which no approach
+            of a branch has anything to do. The report is the same either
+            way.
+        :type event_driven: bool
+        :rtype: None
+        """
+        engines = [TurnEngine(approaches, event_driven)
+                   for approaches in self._branches]
+        route = self._route
+        if route is None:
+            route = round_robin(len(engines))
+        for customer in self._scenario:
+            branch = route(customer)
+            if not 0 <= branch < len(engines):
+                raise ValueError("customer {} was routed to branch {} of {}"
+                                 .format(customer.id(), branch,
+                                         len(engines)))
+            engines[branch].add_customer(customer)
+        for engine in engines:
+            engine.finish()
+
+        with open(report_file_name, "w") as report_file:
+            for number, approaches in enumerate(self._branches, 1):
+                report_file.write("Branch {}:\n".format(number))
+                for approach in approaches:
+                    approach.write_report(report_file)
+
+    def branches(self):
+        """Return the approaches of each branch.
+
+        :rtype: List[List[Restaurant]]
+        """
+        return self._branches
+
+
+def main(arguments=None):
+    """Simulate a chain of branches from the command line.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulate every restaurant approach in several branches "
+                    "sharing one scenario.")
+    parser.add_argument("scenario", help="the scenario file")
+    parser.add_argument("-n", "--branches", type=int, default=2,
+                        help="number of branches")
+    parser.add_argument("--route", choices=sorted(ROUTES),
+                        default="round-robin",
+                        help="how customers are sent to the branches")
+    parser.add_argument("-o", "--output", default="branches_report.txt",
+                        help="file to write the report to")
+    parser.add_argument("--streaming", action="store_true",
+                        help="read the scenario file lazily")
+    parser.add_argument("--turn-by-turn", action="store_true",
+                        help="process every turn instead of only events")
+    options = parser.parse_args(arguments)
+
+    simulator = BranchSimulator(
+        [[approach_class() for approach_class in DEFAULT_APPROACHES]
+         for number in range(options.branches)],
+        ROUTES[options.route](options.branches))
+    simulator.load_scenario(options.scenario, options.streaming,
+                            not options.streaming)
+    simulator.simulate(options.output, not options.turn_by_turn)
+
+
+if __name__ == "__main__":
+    main()
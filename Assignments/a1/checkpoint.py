@@ -0,0 +1,92 @@
+import os
+import pickle
+import time
+
+# Written in every snapshot, and changed whenever its contents change, so
+# that an old snapshot is refused instead of resumed wrongly
+_VERSION = 1
+
+
+class Checkpointer:
+    """A Checkpointer.
+
+    This class writes snapshots of a running simulation to a file at
+    regular intervals, so that it can be resumed if the process is killed.
+
+    A snapshot is a dictionary, pickled together so that objects shared
+    between its values stay shared. Its "position" is the number of
+    customers added to the simulation so far, which the Checkpointer keeps
+    up to date. The file is replaced atomically, so it always holds a
+    complete snapshot.
+    """
+
+    # === Private Attributes ===
+    # :type _file_name: str
+    #   The name of the file snapshots are written to
+    # :type _interval: float
+    #   The least number of seconds between two snapshots
+    # :type _snapshot: dict
+    #   The objects making up the state of the simulation
+    # :type _last_written: float
+    #   The time.monotonic() at which the last snapshot was written
+
+    def __init__(self, file_name, interval, snapshot):
+        """Initialize a Checkpointer for the simulation state in snapshot.
+
+        :param file_name: The name of the file to write snapshots to
+        :type file_name: str
+        :param interval: The least number of seconds between two snapshots
+        :type interval: float
+        :param snapshot: The objects making up the state of the simulation,
+            including its "position"
+        :type snapshot: dict
+        """
+        self._file_name = file_name
+        self._interval = interval
+        self._snapshot = snapshot
+        self._last_written = time.monotonic()
+
+    def customer_added(self):
+        """Record that one more customer was added to the simulation.
+
+        A snapshot is written if the interval has passed since the last one.
+
+        :rtype: None
+        """
+        self._snapshot["position"] += 1
+        if time.monotonic() - self._last_written >= self._interval:
+            self.write()
+
+    def write(self):
+        """Write a snapshot of the simulation now.
+
+        :rtype: None
+        """
+        temporary_file_name = self._file_name + ".tmp"
+        with open(temporary_file_name, "wb") as snapshot_file:
+            pickle.dump((_VERSION, self._snapshot), snapshot_file,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_file_name, self._file_name)
+        self._last_written = time.monotonic()
+
+    def remove(self):
+        """Remove the snapshot file, once the simulation is complete.
+
+        :rtype: None
+        """
+        if os.path.exists(self._file_name):
+            os.remove(self._file_name)
+
+
+def read_snapshot(file_name):
+    """Return the snapshot written by a Checkpointer to file_name.
+
+    :type file_name: str
+    :rtype: dict
+    """
+    with open(file_name, "rb") as snapshot_file:
+        version, snapshot = pickle.load(snapshot_file)
+    if version != _VERSION:
+        raise ValueError("{} is a snapshot of another version of the "
+                         "simulator".format(file_name))
+    return snapshot
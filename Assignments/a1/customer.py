@@ -22,7 +22,9 @@ class Customer:
     # :type _patience: int
     #   The maximum number of turns that this customer will wait for their order
 
-
+    # Customers are created in large numbers, so they keep their attributes
+    # in slots rather than a per-object dictionary.
+    __slots__ = ("_entry_time", "_id", "_profit", "_prepare_time", "_patience")
 
     def __init__(self, definition):
         """
@@ -42,6 +44,33 @@ class Customer:
         (self._prepare_time, self._patience) = \
             (int(info[3]), int(info[4]))
 
+    @classmethod
+    def from_fields(cls, entry_time, id, profit, prepare_time, patience):
+        """
+        Return a customer with the given, already converted, attributes.
+
+        This skips parsing a definition line, for customers coming from a
+        scenario that is already stored in columns.
+
+        :type entry_time: int
+        :type id: str
+        :type profit: float
+        :type prepare_time: int
+        :type patience: int
+        :rtype: Customer
+
+        >>> a = Customer.from_fields(3, "38623", 11.0, 8, 3)
+        >>> a == Customer("3\t38623\t11\t8\t3")
+        True
+        """
+        customer = cls.__new__(cls)
+        customer._entry_time = entry_time
+        customer._id = id
+        customer._profit = profit
+        customer._prepare_time = prepare_time
+        customer._patience = patience
+        return customer
+
     def __eq__(self, other):
         """
         Determine whether two customer profile are equal.
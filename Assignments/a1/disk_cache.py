@@ -0,0 +1,136 @@
+import os
+import tempfile
+
+
+class DiskCache:
+    """A DiskCache.
+
+    This class keeps cached files in a folder, up to a total size and
+    optionally a number of entries. Each entry is one file, named by its
+    key. When the folder grows past either cap, the least recently used
+    entries are evicted. Use is recorded in the modification time of the
+    entries, so several processes can share a cache folder without any
+    index to keep consistent. Subfolders are not entries, so another cache
+    can be kept in one.
+
+    Entries are written to a temporary file first and then renamed, so an
+    entry is either complete or absent.
+    """
+
+    # === Private Attributes ===
+    # :type _folder: str
+    #   The folder the entries are kept in
+    # :type _max_bytes: int
+    #   The largest total size of the entries
+    # :type _max_entries: int | None
+    #   The largest number of entries, or None for no limit
+    # :type _hits: int
+    #   The number of lookups that found their entry
+    # :type _misses: int
+    #   The number of lookups that did not
+    # :type _evictions: int
+    #   The number of entries evicted to stay under the caps
+
+    def __init__(self, folder, max_bytes, max_entries=None):
+        """Initialize a cache in folder holding up to max_bytes of entries,
+        and up to max_entries entries if given.
+
+        :type folder: str
+        :type max_bytes: int
+        :type max_entries: int | None
+        """
+        os.makedirs(folder, exist_ok=True)
+        self._folder = folder
+        self._max_bytes = max_bytes
+        self._max_entries = max_entries
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def lookup(self, name):
+        """Return the file name of the entry called name, or None.
+
+        The entry is marked as just used.
+
+        :type name: str
+        :rtype: str | None
+        """
+        file_name = os.path.join(self._folder, name)
+        try:
+            os.utime(file_name)
+        except FileNotFoundError:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return file_name
+
+    def store(self, name, write):
+        """Store the entry called name, written by write, and return its
+        file name.
+
+        Older entries are then evicted if a cap is exceeded.
+
+        :param name: The name of the entry
+        :type name: str
+        :param write: Called with the name of a file to write the entry in
+        :type write: Callable[[str], None]
+        :rtype: str
+        """
+        file_name = os.path.join(self._folder, name)
+        descriptor, temporary_file_name = tempfile.mkstemp(
+            dir=self._folder, prefix=".", suffix=".tmp")
+        os.close(descriptor)
+        try:
+            write(temporary_file_name)
+            os.replace(temporary_file_name, file_name)
+        except BaseException:
+            os.remove(temporary_file_name)
+            raise
+        self._evict(keep=file_name)
+        return file_name
+
+    def _evict(self, keep):
+        """Evict the least recently used entries, other than keep, until the
+        entries fit under the caps.
+
+        :type keep: str
+        :rtype: None
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self._folder):
+            if entry.is_file() and not entry.name.startswith("."):
+                status = entry.stat()
+                entries.append((status.st_mtime_ns, status.st_size,
+                                entry.path))
+                total += status.st_size
+        entries.sort()
+        count = len(entries)
+        for used, size, file_name in entries:
+            if total <= self._max_bytes and (self._max_entries is None or
+                                             count <= self._max_entries):
+                break
+            if file_name == keep:
+                continue
+            try:
+                os.remove(file_name)
+            except OSError:
+                # in use elsewhere, such as a mapped file on Windows
+                continue
+            total -= size
+            count -= 1
+            self._evictions += 1
+
+    def stats(self):
+        """Return the hit, miss and eviction counts of this cache, and the
+        number and total size of its entries.
+
+        :rtype: dict
+        """
+        entries = [entry.stat().st_size for entry in os.scandir(self._folder)
+                   if entry.is_file() and not entry.name.startswith(".")]
+        return {"hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(entries),
+                "bytes": sum(entries)}
@@ -0,0 +1,606 @@
+"""Binary event traces of the restaurant approaches.
+
+A trace file starts with the 8 bytes b"CSC148T\\x02", followed by chunks.
+Each chunk starts with a header giving its type as one byte, the number of
+the approach it is about as 4 bytes, its number of events as 8 bytes and
+the length of its payload as 8 bytes. All numbers are little-endian. The
+payload is compressed with zlib if the high bit of the type is set.
+
+The payload of an approach chunk is the name of the approach.
+
+Every approach sees the same customers arrive, so arrivals are written
+once, in arrivals chunks: the turn of each arrival as an 8 byte number,
+and then the ids of the customers as a Scenario stores them, that is the
+offset of the end of each encoded id as an 8 byte number followed by all
+the encoded ids.
+
+The payload of an events chunk holds the other events of one approach:
+the kind of each event as one byte, then the turn of each event as an 8
+byte number, then the number of customers that had arrived by each event
+likewise, and then the ids of the customers of the events, encoded in
+UTF-8 and separated by tabs. A customer id never holds a tab, as the
+fields of a scenario line are separated by white space.
+"""
+import argparse
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate, chain
+
+from scenario import Scenario
+
+# The kinds of events in a trace, by their number in the trace file
+ARRIVE, START, FINISH, ABANDON, PREEMPT = range(5)
+EVENT_NAMES = ("arrive", "start", "finish", "abandon", "preempt")
+
+# What became of a customer, by the kind of the last event about them
+_OUTCOMES = {ARRIVE: "waiting", START: "in progress", FINISH: "served",
+             ABANDON: "abandoned", PREEMPT: "preempted"}
+
+# The trace file format is described in the module docstring
+_MAGIC = b"CSC148T\x02"
+_CHUNK = struct.Struct("<BIQQ")
+_APPROACH, _ARRIVALS, _EVENTS = range(3)
+_COMPRESSED = 0x80
+
+
+class ApproachTrace:
+    """The trace of one approach.
+
+    A Restaurant given an ApproachTrace with set_trace tells it about each
+    order started, finished or abandoned, each waiting customer abandoning,
+    and each order preempted by a customer entering in the same turn, along
+    with the number of customers that had entered by then. The arrivals are
+    recorded once for all approaches by the TraceWriter. Events are
+    buffered here in compact columns, and written by the TraceWriter in
+    chunks.
+    """
+
+    # === Private Attributes ===
+    # :type _writer: TraceWriter
+    #   The writer of the trace file
+    # :type _number: int
+    #   The number of the approach in the trace file
+    # :type _buffer_events: int
+    #   The number of events to buffer before writing them
+    # :type _kinds: List[int]
+    #   The kind of each buffered event
+    # :type _turns: array
+    #   The turn of each buffered event
+    # :type _arrived: array
+    #   The number of customers that had arrived by each buffered event
+    # :type _ids: List[str]
+    #   The id of the customer of each buffered event
+
+    def __init__(self, writer, number, buffer_events):
+        """Initialize an empty trace of approach number number of writer.
+
+        :type writer: TraceWriter
+        :type number: int
+        :param buffer_events: The number of events to buffer before
+            writing them
+        :type buffer_events: int
+        """
+        self._writer = writer
+        self._number = number
+        self._buffer_events = buffer_events
+        self._clear()
+
+    def _clear(self):
+        """Forget the buffered events.
+
+        :rtype: None
+        """
+        self._kinds = []
+        self._turns = array("q")
+        self._arrived = array("q")
+        self._ids = []
+
+    def start(self, turn, customer, entered):
+        """Record that the order of customer was started on turn.
+
+        :type turn: int
+        :type customer: Customer
+        :param entered: The number of customers that had entered by then
+        :type entered: int
+        :rtype: None
+        """
+        # every order starts and ends, so checking here keeps the buffer
+        # near its size
+        if len(self._ids) >= self._buffer_events:
+            self.flush()
+        self._kinds.append(START)
+        self._turns.append(turn)
+        self._arrived.append(entered)
+        self._ids.append(customer._id)
+
+    def finish(self, turn, customer, entered):
+        """Record that the order of customer was served on turn.
+
+        :type turn: int
+        :type customer: Customer
+        :param entered: The number of customers that had entered by then
+        :type entered: int
+        :rtype: None
+        """
+        self._kinds.append(FINISH)
+        self._turns.append(turn)
+        self._arrived.append(entered)
+        self._ids.append(customer._id)
+
+    def abandon(self, turn, customer, entered):
+        """Record that customer left on turn without being served, from the
+        waiting list or while their order was in progress.
+
+        :type turn: int
+        :type customer: Customer
+        :param entered: The number of customers that had entered by then
+        :type entered: int
+        :rtype: None
+        """
+        self._kinds.append(ABANDON)
+        self._turns.append(turn)
+        self._arrived.append(entered)
+        self._ids.append(customer._id)
+
+    def preempt(self, turn, customer, entered):
+        """Record that the order of customer was dropped on turn for the
+        order of a customer entering in the same turn.
+
+        :type turn: int
+        :type customer: Customer
+        :param entered: The number of customers that had entered by then
+        :type entered: int
+        :rtype: None
+        """
+        self._kinds.append(PREEMPT)
+        self._turns.append(turn)
+        self._arrived.append(entered)
+        self._ids.append(customer._id)
+
+    def flush(self):
+        """Write the buffered events to the trace file.
+
+        :rtype: None
+        """
+        if len(self._ids) > 0:
+            self._writer.write_events(self._number, self._kinds, self._turns,
+                                      self._arrived, self._ids)
+            self._clear()
+
+
+class TraceWriter:
+    """A TraceWriter.
+
+    This class writes the event traces of the approaches of a simulation to
+    one binary trace file. Each approach to trace is given an ApproachTrace
+    with trace(), and the customers are recorded by passing them through
+    arrivals() on their way to the approaches. Events are buffered and
+    written in chunks of about buffer_events events. Each event takes 17
+    bytes and the id of its customer with a tab; compressing the chunks
+    makes the file several times smaller, but doubles the cost of tracing.
+    The trace file is complete once the writer is closed, or at the end of
+    a with statement.
+
+    Use read_trace to read the events back, and customer_table to turn
+    them into one row per customer.
+
+    >>> import os, tempfile
+    >>> from customer import Customer
+    >>> from restaurant import MaxApproach
+    >>> name = os.path.join(tempfile.mkdtemp(), "trace.bin")
+    >>> approach = MaxApproach()
+    >>> with TraceWriter(name) as writer:
+    ...     writer.trace(approach)
+    ...     for customer in writer.arrivals([Customer("1\\t1\\t5\\t2\\t9")]):
+    ...         approach.add_customer(customer)
+    ...     approach.process_turn(3)
+    >>> for row in read_trace(name):
+    ...     print(*row)
+    MaxApproach 1 arrive 1
+    MaxApproach 1 start 1
+    MaxApproach 3 finish 1
+    """
+
+    # === Private Attributes ===
+    # :type _file: File
+    #   The open trace file
+    # :type _compress: bool
+    #   Whether to compress the chunks
+    # :type _buffer_events: int
+    #   The number of events to buffer for each approach
+    # :type _approaches: List[Restaurant]
+    #   The approaches traced, by their number in the trace file
+    # :type _traces: List[ApproachTrace]
+    #   The trace of each approach
+    # :type _arrival_turns: List[int]
+    #   The entry turn of each buffered arrival
+    # :type _arrival_ids: List[str]
+    #   The id of each buffered arrival
+
+    def __init__(self, trace_file_name, compress=False,
+                 buffer_events=1 << 16):
+        """Initialize a writer of a new trace file called trace_file_name.
+
+        :type trace_file_name: str
+        :param compress: Whether to compress the events
+        :type compress: bool
+        :param buffer_events: The number of events of each approach to
+            buffer before writing them
+        :type buffer_events: int
+        """
+        self._file = open(trace_file_name, "wb")
+        self._file.write(_MAGIC)
+        self._compress = compress
+        self._buffer_events = buffer_events
+        self._approaches = []
+        self._traces = []
+        self._arrival_turns = []
+        self._arrival_ids = []
+
+    def trace(self, approach):
+        """Start tracing the events of approach.
+
+        :type approach: Restaurant
+        :rtype: None
+        """
+        number = len(self._traces)
+        name = type(approach).__name__.encode()
+        self._file.write(_CHUNK.pack(_APPROACH, number, 0, len(name)))
+        self._file.write(name)
+        trace = ApproachTrace(self, number, self._buffer_events)
+        self._approaches.append(approach)
+        self._traces.append(trace)
+        approach.set_trace(trace)
+
+    def arrivals(self, customers):
+        """Record the arrival of each of customers, and return customers
+        to give the approaches traced.
+
+        A list of customers or a Scenario is recorded at once, and returned
+        as it is. The customers of any other iterable are recorded as they
+        are taken from the iterator returned. Every approach traced is to be
+        given the same customers, in the same order.
+
+        :type customers: List[Customer] | Scenario | Iterable[Customer]
+        :rtype: List[Customer] | Scenario | Iterator[Customer]
+        """
+        # recording the customers as they arrive slows the simulation down
+        # much more than recording them all beforehand
+        if isinstance(customers, Scenario):
+            self._write_chunk(_ARRIVALS, 0, len(customers),
+                              [_little_endian(customers._entry_times),
+                               _little_endian(customers._id_ends),
+                               customers._ids])
+            return customers
+        if isinstance(customers, list):
+            for start in range(0, len(customers), self._buffer_events):
+                for customer in customers[start:start + self._buffer_events]:
+                    self._arrival_turns.append(customer._entry_time)
+                    self._arrival_ids.append(customer._id)
+                self._flush_arrivals()
+            return customers
+        return self._stream_arrivals(customers)
+
+    def _stream_arrivals(self, customers):
+        """Yield customers, recording the arrival of each.
+
+        :type customers: Iterable[Customer]
+        :rtype: Iterator[Customer]
+        """
+        turns = self._arrival_turns
+        ids = self._arrival_ids
+        for customer in customers:
+            turns.append(customer._entry_time)
+            ids.append(customer._id)
+            if len(ids) >= self._buffer_events:
+                self._flush_arrivals()
+            yield customer
+
+    def _flush_arrivals(self):
+        """Write the buffered arrivals to the trace file.
+
+        :rtype: None
+        """
+        if len(self._arrival_ids) > 0:
+            self._write_chunk(_ARRIVALS, 0, len(self._arrival_ids),
+                              [_little_endian(array("q",
+                                                    self._arrival_turns))] +
+                              _id_columns(self._arrival_ids))
+            # cleared in place, as _stream_arrivals appends to them
+            del self._arrival_turns[:]
+            del self._arrival_ids[:]
+
+    def write_events(self, number, kinds, turns, arrived, ids):
+        """Write events of approach number to the trace file, after the
+        arrivals buffered so far, which a reader needs first.
+
+        :param number: The number of the approach in the trace file
+        :type number: int
+        :param kinds: The kind of each event
+        :type kinds: List[int]
+        :param turns: The turn of each event
+        :type turns: array
+        :param arrived: The number of customers that had arrived by each
+            event
+        :type arrived: array
+        :param ids: The id of the customer of each event
+        :type ids: List[str]
+        :rtype: None
+        """
+        joined = "\t".join(ids)
+        if joined.count("\t") != len(ids) - 1:
+            raise ValueError("a customer id holds a tab")
+        self._flush_arrivals()
+        self._write_chunk(_EVENTS, number, len(ids),
+                          [bytes(kinds), _little_endian(turns),
+                           _little_endian(arrived), joined.encode()])
+
+    def _write_chunk(self, chunk_type, number, count, columns):
+        """Write a chunk of count events of approach number.
+
+        :type chunk_type: int
+        :type number: int
+        :type count: int
+        :param columns: The stored columns of the events, in order
+        :type columns: List[bytes | bytearray | array | memoryview]
+        :rtype: None
+        """
+        payload = b"".join(columns)
+        if self._compress:
+            payload = zlib.compress(payload, 1)
+            chunk_type |= _COMPRESSED
+        self._file.write(_CHUNK.pack(chunk_type, number, count, len(payload)))
+        self._file.write(payload)
+
+    def close(self):
+        """Write the events still buffered, stop tracing the approaches and
+        close the trace file.
+
+        :rtype: None
+        """
+        if self._file.closed:
+            return
+        self._flush_arrivals()
+        for approach, trace in zip(self._approaches, self._traces):
+            trace.flush()
+            approach.set_trace(None)
+        self._file.close()
+
+    def __enter__(self):
+        """Return this TraceWriter, for a with statement.
+
+        :rtype: TraceWriter
+        """
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        """Close this TraceWriter at the end of a with statement.
+
+        :rtype: None
+        """
+        self.close()
+
+
+def _little_endian(column):
+    """Return column of 8 byte numbers stored little-endian.
+
+    :type column: array | memoryview
+    :rtype: array | memoryview
+    """
+    if sys.byteorder != "little":
+        column = array("q", column)
+        column.byteswap()
+    return column
+
+
+def _id_columns(ids):
+    """Return the column of end offsets and the column of encoded ids
+    that store ids.
+
+    :type ids: List[str]
+    :rtype: List[array | bytes]
+    """
+    joined = "".join(ids).encode()
+    if len(joined) == sum(map(len, ids)):
+        # all ids are ASCII, so characters and bytes line up
+        ends = array("q", accumulate(map(len, ids)))
+    else:
+        ends = array("q", accumulate(len(customer_id.encode())
+                                     for customer_id in ids))
+    return [_little_endian(ends), joined]
+
+
+def read_trace(trace_file_name):
+    """Yield the events in trace_file_name.
+
+    Each event is an (approach name, turn, event name, customer id) tuple.
+    The events of each approach are in the order they happened. A customer
+    who runs out of patience while waiting is only found to abandon when
+    the next customer arrives, but is given the turn their patience ran out.
+
+    The arrivals are kept in memory until the events of every approach are
+    read.
+
+    :type trace_file_name: str
+    :rtype: Iterator[(str, int, str, str)]
+    """
+    names = []
+    arrival_turns = array("q")
+    arrival_ids = []
+    # the number of arrivals yielded for each approach so far
+    yielded = []
+    for chunk_type, number, count, payload in _read_chunks(trace_file_name):
+        if chunk_type == _APPROACH:
+            names.append(payload.decode())
+            yielded.append(0)
+        elif chunk_type == _ARRIVALS:
+            turns, ids = _split_arrivals(payload, count)
+            arrival_turns.extend(turns)
+            arrival_ids.extend(ids)
+        else:
+            name = names[number]
+            kinds = payload[:count]
+            end = count + 16 * count
+            numbers = _numbers(payload[count:end])
+            ids = payload[end:].decode().split("\t")
+            for event in range(count):
+                # the arrivals before the event come first
+                for arrival in range(yielded[number],
+                                     numbers[count + event]):
+                    yield (name, arrival_turns[arrival], "arrive",
+                           arrival_ids[arrival])
+                    yielded[number] = arrival + 1
+                yield (name, numbers[event], EVENT_NAMES[kinds[event]],
+                       ids[event])
+    for number, name in enumerate(names):
+        for arrival in range(yielded[number], len(arrival_ids)):
+            yield name, arrival_turns[arrival], "arrive", arrival_ids[arrival]
+
+
+def _read_chunks(trace_file_name):
+    """Yield the (type, approach number, count, payload) of each chunk of
+    trace_file_name, with the payloads decompressed.
+
+    :type trace_file_name: str
+    :rtype: Iterator[(int, int, int, bytes)]
+    """
+    with open(trace_file_name, "rb") as trace_file:
+        if trace_file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("{} is not a trace file".format(trace_file_name))
+        while True:
+            header = trace_file.read(_CHUNK.size)
+            if len(header) == 0:
+                return
+            if len(header) < _CHUNK.size:
+                raise ValueError("{} is truncated".format(trace_file_name))
+            chunk_type, number, count, length = _CHUNK.unpack(header)
+            payload = trace_file.read(length)
+            if len(payload) < length:
+                raise ValueError("{} is truncated".format(trace_file_name))
+            if chunk_type & _COMPRESSED:
+                payload = zlib.decompress(payload)
+            yield chunk_type & ~_COMPRESSED, number, count, payload
+
+
+def _split_arrivals(payload, count):
+    """Return the turns and the ids of the count arrivals stored in payload.
+
+    :type payload: bytes
+    :type count: int
+    :rtype: (array, List[str])
+    """
+    end = 16 * count
+    numbers = _numbers(payload[:end])
+    ends = numbers[count:]
+    return numbers[:count], [payload[end + id_start:end + id_end].decode()
+                             for id_start, id_end
+                             in zip(chain([0], ends), ends)]
+
+
+def _numbers(data):
+    """Return the little-endian 8 byte numbers stored in data.
+
+    :type data: bytes
+    :rtype: array
+    """
+    numbers = array("q", data)
+    if sys.byteorder != "little":
+        numbers.byteswap()
+    return numbers
+
+
+def customer_table(events):
+    """Return one row per approach and customer of the trace events.
+
+    Each row is (approach name, customer id, arrival turn, start turn, end
+    turn, outcome), where the outcome is served, abandoned, preempted, or
+    waiting if the order of the customer was never started. The start and
+    end turns are None for events that did not happen. The rows of each
+    approach are in arrival order.
+
+    Serving a customer is final. A customer who replaced an order can still
+    be in the waiting list once served, and their order is then started
+    again and dropped; the row keeps the order that was served.
+
+    :param events: The events, as yielded by read_trace
+    :type events: Iterable[(str, int, str, str)]
+    :rtype: List[(str, str, int, int | None, int | None, str)]
+    """
+    rows = {}
+    for name, turn, event, customer_id in events:
+        key = (name, customer_id)
+        if event == "arrive":
+            rows[key] = [name, customer_id, turn, None, None, "waiting"]
+            continue
+        row = rows[key]
+        if row[5] == "served":
+            continue
+        if event == "start":
+            row[3] = turn
+            row[5] = "in progress"
+        else:
+            row[4] = turn
+            row[5] = _OUTCOMES[EVENT_NAMES.index(event)]
+    return [tuple(row) for row in rows.values()]
+
+
+def write_tables(trace_file_name, events_file_name=None,
+                 customers_file_name=None):
+    """Write the events in trace_file_name, and the table of customers they
+    give, as tab separated values.
+
+    :type trace_file_name: str
+    :param events_file_name: The file to write the events to, or None
+    :type events_file_name: str | None
+    :param customers_file_name: The file to write the customer table to,
+        or None
+    :type customers_file_name: str | None
+    :rtype: None
+    """
+    if events_file_name is not None:
+        _write_rows(events_file_name, ("approach", "turn", "event", "id"),
+                    read_trace(trace_file_name))
+    if customers_file_name is not None:
+        _write_rows(customers_file_name,
+                    ("approach", "id", "arrived", "started", "ended",
+                     "outcome"),
+                    customer_table(read_trace(trace_file_name)))
+
+
+def _write_rows(file_name, columns, rows):
+    """Write the rows under the column names to file_name as tab separated
+    values, with empty fields for None.
+
+    :type file_name: str
+    :type columns: tuple
+    :type rows: Iterable[tuple]
+    :rtype: None
+    """
+    with open(file_name, "w") as table_file:
+        table_file.write("\t".join(columns) + "\n")
+        for row in rows:
+            table_file.write("\t".join("" if value is None else str(value)
+                                       for value in row) + "\n")
+
+
+def main(arguments=None):
+    """Turn a trace file into tables from the command line.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Write the events of a simulation trace as tables.")
+    parser.add_argument("trace", help="the trace file")
+    parser.add_argument("--events", default=None,
+                        help="file to write the events to")
+    parser.add_argument("--customers", default="customers.tsv",
+                        help="file to write one row per customer to")
+    options = parser.parse_args(arguments)
+    write_tables(options.trace, options.events, options.customers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import csv
+import json
+import time
+from array import array
+
+
+class ApproachStats:
+    """The statistics collected for one approach during a simulation.
+
+    === Public Attributes ===
+    :type name: str
+        The name of the approach
+    :type add_calls: int
+        The number of calls to add_customer
+    :type add_seconds: float
+        The time spent in add_customer
+    :type turn_calls: int
+        The number of calls to process_turn
+    :type turn_seconds: float
+        The time spent in process_turn
+    :type abandoned: int
+        The number of customers that left without being served, either from
+        the waiting list or while their order was in progress
+    :type idle_turns: int
+        The number of turns in which no order was in progress
+    :type depth_turns: array
+        The turns at which the waiting list depth was sampled
+    :type depths: array
+        The waiting list depth at each turn of depth_turns, after the
+        customers of that turn were added and the turn was processed
+    """
+
+    def __init__(self, name):
+        """Initialize empty statistics for the approach called name.
+
+        :type name: str
+        """
+        self.name = name
+        self.add_calls = 0
+        self.add_seconds = 0.0
+        self.turn_calls = 0
+        self.turn_seconds = 0.0
+        self.abandoned = 0
+        self.idle_turns = 0
+        self.depth_turns = array("q")
+        self.depths = array("q")
+
+    def counters(self):
+        """Return the counters of these statistics by name.
+
+        :rtype: dict
+        """
+        return {"approach": self.name,
+                "add_calls": self.add_calls,
+                "add_seconds": self.add_seconds,
+                "turn_calls": self.turn_calls,
+                "turn_seconds": self.turn_seconds,
+                "abandoned": self.abandoned,
+                "idle_turns": self.idle_turns}
+
+
+class InstrumentedApproach:
+    """A restaurant approach that records ApproachStats.
+
+    This class wraps an approach for a TurnEngine. It passes every call on
+    to the approach and times it, and records the waiting list depth and
+    the idle turns of the approach.
+
+    In event driven simulations process_turn is only called on the turns
+    where something happens, so the depth is only sampled on those turns.
+    Idle turns are counted exactly in both modes.
+    """
+
+    # === Private Attributes ===
+    # :type _approach: Restaurant
+    #   The approach being instrumented
+    # :type _stats: ApproachStats
+    #   The statistics recorded for it
+    # :type _idle_since: int | None
+    #   The first turn of the current idle stretch, or None when an order
+    #   is in progress
+
+    def __init__(self, approach, stats):
+        """Initialize an instrumented approach recording into stats.
+
+        :type approach: Restaurant
+        :type stats: ApproachStats
+        """
+        self._approach = approach
+        self._stats = stats
+        self._idle_since = 1 if approach.is_idle() else None
+
+    def add_customer(self, new_customer):
+        """Add new_customer to the approach, timing the call.
+
+        :type new_customer: Customer
+        :rtype: None
+        """
+        start = time.perf_counter()
+        self._approach.add_customer(new_customer)
+        self._stats.add_seconds += time.perf_counter() - start
+        self._stats.add_calls += 1
+        if self._idle_since is not None and not self._approach.is_idle():
+            self._stats.idle_turns += new_customer.entry_turn() - \
+                self._idle_since
+            self._idle_since = None
+
+    def process_turn(self, current_turn):
+        """Process current_turn on the approach, timing the call.
+
+        :type current_turn: int
+        :rtype: None
+        """
+        start = time.perf_counter()
+        self._approach.process_turn(current_turn)
+        self._stats.turn_seconds += time.perf_counter() - start
+        self._stats.turn_calls += 1
+        self._stats.depth_turns.append(current_turn)
+        self._stats.depths.append(self._approach.number_waiting())
+        if self._idle_since is None and self._approach.is_idle():
+            self._idle_since = current_turn + 1
+
+    def next_event_turn(self, current_turn):
+        """Return the next event turn of the approach.
+
+        :type current_turn: int
+        :rtype: int | None
+        """
+        return self._approach.next_event_turn(current_turn)
+
+    def close(self, end_turn):
+        """Finish the statistics of a simulation that ended before end_turn.
+
+        :type end_turn: int
+        :rtype: None
+        """
+        if self._idle_since is not None and end_turn > self._idle_since:
+            self._stats.idle_turns += end_turn - self._idle_since
+            self._idle_since = end_turn
+        self._stats.abandoned = self._approach.number_abandoned() + \
+            self._approach.number_dropped()
+
+
+class Instrumentation:
+    """Per-approach counters and time series of a simulation.
+
+    Pass an Instrumentation to Simulator.simulate to collect statistics for
+    each approach. Without one, the simulation runs uninstrumented and
+    pays nothing for it. The statistics can be written as JSON or CSV.
+    """
+
+    # === Private Attributes ===
+    # :type _stats: List[ApproachStats]
+    #   The statistics of each approach, in report order
+
+    def __init__(self):
+        """Initialize an Instrumentation with no statistics yet.
+        """
+        self._stats = []
+
+    def instrument(self, approaches):
+        """Return the approaches wrapped to record statistics here.
+
+        :type approaches: List[Restaurant]
+        :rtype: List[InstrumentedApproach]
+        """
+        instrumented = []
+        for approach in approaches:
+            stats = ApproachStats(type(approach).__name__)
+            self._stats.append(stats)
+            instrumented.append(InstrumentedApproach(approach, stats))
+        return instrumented
+
+    def add_stats(self, stats):
+        """Add statistics recorded elsewhere, such as in a worker process.
+
+        :type stats: ApproachStats
+        :rtype: None
+        """
+        self._stats.append(stats)
+
+    def stats(self):
+        """Return the statistics of each approach, in report order.
+
+        :rtype: List[ApproachStats]
+        """
+        return list(self._stats)
+
+    def write_json(self, file_name):
+        """Write all counters and time series to file_name as JSON.
+
+        :type file_name: str
+        :rtype: None
+        """
+        approaches = []
+        for stats in self._stats:
+            record = stats.counters()
+            record["depth_turns"] = stats.depth_turns.tolist()
+            record["depths"] = stats.depths.tolist()
+            approaches.append(record)
+        with open(file_name, "w") as json_file:
+            json.dump({"approaches": approaches}, json_file)
+
+    def write_csv(self, file_name):
+        """Write the counters to file_name as CSV, one row per approach.
+
+        :type file_name: str
+        :rtype: None
+        """
+        with open(file_name, "w", newline="") as csv_file:
+            writer = None
+            for stats in self._stats:
+                counters = stats.counters()
+                if writer is None:
+                    writer = csv.DictWriter(csv_file, list(counters))
+                    writer.writeheader()
+                writer.writerow(counters)
+
+    def write_depths_csv(self, file_name):
+        """Write the waiting list depths to file_name as CSV.
+
+        Each row gives an approach, a turn and the depth at that turn.
+
+        :type file_name: str
+        :rtype: None
+        """
+        with open(file_name, "w", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(["approach", "turn", "depth"])
+            for stats in self._stats:
+                for turn, depth in zip(stats.depth_turns, stats.depths):
+                    writer.writerow([stats.name, turn, depth])
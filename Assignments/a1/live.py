@@ -0,0 +1,273 @@
+import argparse
+import asyncio
+import io
+import os
+import sys
+
+from customer import Customer
+from restaurant import DEFAULT_APPROACHES
+from simulator import TurnEngine, result_rows
+
+
+class LiveSimulator:
+    """A LiveSimulator.
+
+    This class simulates the approaches on customers arriving from a live
+    source, such as a socket or a pipe, instead of a finished scenario file.
+    Each customer is added as soon as their line arrives, and turns are
+    processed as arrivals come in or on a clock. The totals of each approach
+    can be read, and interim reports written, at any time without stopping
+    the simulation.
+
+    Customers must arrive in order of entry turn. A customer who arrives
+    after the clock has passed their entry turn is added late: they enter
+    at the current turn, and their patience runs from then.
+    """
+
+    # === Private Attributes ===
+    # :type _approaches: List[Restaurant]
+    #   The approaches being simulated, in report order
+    # :type _engine: TurnEngine
+    #   The engine driving the approaches through the turns
+    # :type _number_rejected: int
+    #   The number of malformed lines skipped
+
+    def __init__(self, approaches=None, event_driven=True):
+        """Initialize a LiveSimulator with no customers yet.
+
+        :param approaches: The approaches to simulate, in report order.
+            Defaults to the Pat, Mat, Max and Pac approaches.
+        :type approaches: List[Restaurant] | None
+        :type event_driven: bool
+        """
+        if approaches is None:
+            approaches = [approach_class()
+                          for approach_class in DEFAULT_APPROACHES]
+        self._approaches = list(approaches)
+        self._engine = TurnEngine(self._approaches, event_driven)
+        self._number_rejected = 0
+
+    def add_line(self, line):
+        """Add the customer described by line, a line of a scenario file.
+
+        Blank lines are ignored. Malformed lines are skipped and counted, so
+        that one bad line does not stop a live feed. Return the customer
+        added, or None. A customer whose entry turn has already been
+        processed enters at the current turn instead.
+
+        :type line: str | bytes
+        :rtype: Customer | None
+
+        >>> live = LiveSimulator()
+        >>> live.advance(50)
+        >>> live.add_line("1\t1\t5\t5\t10").entry_turn()
+        50
+        >>> live.add_line("garbage") is None, live.number_rejected()
+        (True, 1)
+        """
+        try:
+            if isinstance(line, bytes):
+                line = line.decode()
+            line = line.strip()
+            if line == "":
+                return None
+            customer = Customer(line)
+        except (ValueError, IndexError):
+            self._number_rejected += 1
+            return None
+        current_turn = self.current_turn()
+        if customer.entry_turn() < current_turn:
+            customer = Customer.from_fields(
+                current_turn, customer.id(), customer._profit,
+                customer._prepare_time, customer.patience())
+        self._engine.add_customer(customer)
+        return customer
+
+    def advance(self, turn):
+        """Process every turn before turn, as the clock reaches it.
+
+        :type turn: int
+        :rtype: None
+        """
+        self._engine.advance(turn)
+
+    def current_turn(self):
+        """Return the first turn that has not been processed yet.
+
+        :rtype: int
+        """
+        return self._engine.current_turn()
+
+    def totals(self):
+        """Return the running totals of each approach, in report order.
+
+        Each total is a (approach name, total profit, customers served,
+        customers unserved) row.
+
+        :rtype: List[(str, float, int, int)]
+        """
+        return result_rows(self._approaches)
+
+    def number_rejected(self):
+        """Return the number of malformed lines skipped so far.
+
+        :rtype: int
+        """
+        return self._number_rejected
+
+    def report(self):
+        """Return the report of all approaches so far, followed by the number
+        of lines rejected if there were any.
+
+        :rtype: str
+        """
+        report_file = io.StringIO()
+        for approach in self._approaches:
+            approach.write_report(report_file)
+        if self._number_rejected > 0:
+            report_file.write("Lines rejected: {}\n".format(
+                self._number_rejected))
+        return report_file.getvalue()
+
+    def write_report(self, report_file_name):
+        """Write the report of all approaches so far in report_file_name.
+
+        The file is replaced atomically, so readers never see a partial
+        report.
+
+        :type report_file_name: str
+        :rtype: None
+        """
+        temporary_file_name = report_file_name + ".tmp"
+        with open(temporary_file_name, "w") as report_file:
+            report_file.write(self.report())
+        os.replace(temporary_file_name, report_file_name)
+
+    def finish(self):
+        """Process the remaining turns, once no more customers will arrive.
+
+        :rtype: None
+        """
+        self._engine.finish()
+
+    async def run(self, source, turn_seconds=None, report_file_name=None,
+                  report_seconds=None):
+        """Simulate the customers of source until it is exhausted.
+
+        Turns are processed as customers arrive. With turn_seconds, they are
+        also processed as a clock reaches them, one turn every turn_seconds
+        seconds from the start, so the approaches keep serving while no one
+        arrives. With report_file_name and report_seconds, an interim report
+        is written every report_seconds seconds. The final report is
+        written to report_file_name once source is exhausted.
+
+        :param source: The lines of the customers, as they arrive
+        :type source: AsyncIterable[str | bytes]
+        :type turn_seconds: float | None
+        :type report_file_name: str | None
+        :type report_seconds: float | None
+        :rtype: None
+        """
+        tasks = []
+        if turn_seconds is not None:
+            tasks.append(asyncio.ensure_future(self._tick(turn_seconds)))
+        if report_file_name is not None and report_seconds is not None:
+            tasks.append(asyncio.ensure_future(
+                self._report_every(report_file_name, report_seconds)))
+        try:
+            async for line in source:
+                self.add_line(line)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.finish()
+        if report_file_name is not None:
+            self.write_report(report_file_name)
+
+    async def _tick(self, turn_seconds):
+        """Process each turn as the clock passes it, until cancelled.
+
+        :type turn_seconds: float
+        :rtype: None
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while True:
+            turn = self.current_turn()
+            # sleep until the end of the first turn not processed yet
+            await asyncio.sleep(max(0.0, start + turn * turn_seconds -
+                                    loop.time()))
+            self.advance(1 + int((loop.time() - start) / turn_seconds))
+
+    async def _report_every(self, report_file_name, report_seconds):
+        """Write an interim report every report_seconds, until cancelled.
+
+        :type report_file_name: str
+        :type report_seconds: float
+        :rtype: None
+        """
+        while True:
+            await asyncio.sleep(report_seconds)
+            self.write_report(report_file_name)
+
+
+async def tcp_lines(host, port):
+    """Yield the lines received from a TCP connection to host and port.
+
+    :type host: str
+    :type port: int
+    :rtype: AsyncIterator[bytes]
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async for line in reader:
+            yield line
+    finally:
+        writer.close()
+
+
+async def pipe_lines(pipe):
+    """Yield the lines read from pipe, such as sys.stdin, without blocking.
+
+    :type pipe: file
+    :rtype: AsyncIterator[bytes]
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    async for line in reader:
+        yield line
+
+
+def main(arguments=None):
+    """Shadow a live customer stream from the command line.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulate every restaurant approach on a live stream of "
+                    "customers.")
+    parser.add_argument("--connect", default=None, metavar="HOST:PORT",
+                        help="read customers from a TCP connection instead "
+                             "of standard input")
+    parser.add_argument("--turn-seconds", type=float, default=None,
+                        help="process a turn every this many seconds")
+    parser.add_argument("-o", "--report", default="live_report.txt",
+                        help="file to write the reports to")
+    parser.add_argument("--report-seconds", type=float, default=10.0,
+                        help="write an interim report this often")
+    options = parser.parse_args(arguments)
+
+    if options.connect is None:
+        source = pipe_lines(sys.stdin)
+    else:
+        host, port = options.connect.rsplit(":", 1)
+        source = tcp_lines(host, int(port))
+    asyncio.run(LiveSimulator().run(source, options.turn_seconds,
+                                    options.report, options.report_seconds))
+
+
+if __name__ == "__main__":
+    main()
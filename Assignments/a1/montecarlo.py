@@ -0,0 +1,260 @@
+import argparse
+import math
+import multiprocessing
+import statistics
+
+from benchmark import generate_customers
+from restaurant import DEFAULT_APPROACHES
+from simulator import run_approaches
+
+
+def t_quantile(probability, degrees):
+    """Return the quantile of Student's t distribution at probability.
+
+    From 5 degrees of freedom on, this uses the Cornish-Fisher expansion
+    around the normal quantile, which is accurate to about 0.01 there.
+    Below, where the expansion is far too small, the exact distribution
+    function is inverted by bisection.
+
+    :type probability: float
+    :param degrees: The degrees of freedom
+    :type degrees: int
+    :rtype: float
+
+    >>> round(t_quantile(0.975, 10), 2)
+    2.23
+    >>> round(t_quantile(0.975, 1), 2), round(t_quantile(0.975, 2), 2)
+    (12.71, 4.3)
+    """
+    if degrees < 5:
+        if probability < 0.5:
+            return -t_quantile(1 - probability, degrees)
+        low, high = 0.0, 1.0
+        while _t_cdf(high, degrees) < probability:
+            low, high = high, 2 * high
+        for step in range(100):
+            middle = (low + high) / 2
+            if _t_cdf(middle, degrees) < probability:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+    z = statistics.NormalDist().inv_cdf(probability)
+    return (z + (z ** 3 + z) / (4 * degrees) +
+            (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * degrees ** 2) +
+            (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) /
+            (384 * degrees ** 3))
+
+
+def _t_cdf(t, degrees):
+    """Return the distribution function of Student's t distribution at t,
+    for a whole number of degrees of freedom.
+
+    This is the exact finite series in the angle atan(t / sqrt(degrees)).
+
+    :type t: float
+    :param degrees: The degrees of freedom
+    :type degrees: int
+    :rtype: float
+
+    >>> _t_cdf(0, 3), round(_t_cdf(1, 1), 4)
+    (0.5, 0.75)
+    """
+    theta = math.atan(t / math.sqrt(degrees))
+    cos_squared = math.cos(theta) ** 2
+    term = 1.0
+    total = 0.0
+    if degrees % 2 == 1:
+        for k in range((degrees - 1) // 2):
+            total += term
+            term *= (2 * k + 2) / (2 * k + 3) * cos_squared
+        inside = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) *
+                                total)
+    else:
+        for k in range(degrees // 2):
+            total += term
+            term *= (2 * k + 1) / (2 * k + 2) * cos_squared
+        inside = math.sin(theta) * total
+    return (1 + inside) / 2
+
+
+def confidence_interval(values, confidence=0.95):
+    """Return the mean of values and the half width of its confidence
+    interval.
+
+    :type values: List[float]
+    :type confidence: float
+    :rtype: (float, float)
+
+    >>> confidence_interval([1, 2, 3, 4, 5], 0.95)[0]
+    3
+    """
+    mean = statistics.mean(values)
+    if len(values) < 2:
+        return mean, float("inf")
+    return mean, (t_quantile((1 + confidence) / 2, len(values) - 1) *
+                  statistics.stdev(values) / len(values) ** 0.5)
+
+
+def intervals_separate(intervals):
+    """Return whether no two of the (mean, half width) intervals overlap.
+
+    :type intervals: List[(float, float)]
+    :rtype: bool
+
+    >>> intervals_separate([(1, 0.5), (3, 1), (5, 0.9)])
+    True
+    >>> intervals_separate([(1, 0.5), (2, 1)])
+    False
+    """
+    bounds = sorted((mean - half, mean + half) for mean, half in intervals)
+    return all(low > previous_high for (previous_low, previous_high),
+               (low, high) in zip(bounds, bounds[1:]))
+
+
+def simulate_seed(seed, customers, event_driven, distributions):
+    """Simulate every approach on the random scenario of seed.
+
+    Return the (total profit, customers served) of each approach, in
+    report order.
+
+    :type seed: int
+    :param customers: The number of customers of the scenario
+    :type customers: int
+    :type event_driven: bool
+    :param distributions: Passed on to generate_customers
+    :type distributions: dict
+    :rtype: List[(float, int)]
+    """
+    scenario = generate_customers(customers, seed, **distributions)
+    approaches = [approach_class() for approach_class in DEFAULT_APPROACHES]
+    run_approaches(approaches, scenario, event_driven)
+    return [(approach.total_profit(), approach.number_served())
+            for approach in approaches]
+
+
+def run_monte_carlo(runs, customers=1000, seed=0, processes=None,
+                    confidence=0.95, min_runs=10, event_driven=True,
+                    **distributions):
+    """Compare the approaches on up to runs random scenarios.
+
+    Scenario i is generated with seed + i, so the results only depend on
+    the arguments. The scenarios are simulated across a pool of worker
+    processes. Once at least min_runs are done, the comparison stops early
+    as soon as the confidence intervals of the mean profit of the
+    approaches are all separate.
+
+    Return a dictionary giving the number of runs, whether the comparison
+    stopped early, and for each approach its name and the (mean, half
+    width) of its profit and customers served.
+
+    :param runs: The largest number of scenarios to simulate
+    :type runs: int
+    :param customers: The number of customers of each scenario
+    :type customers: int
+    :type seed: int
+    :param processes: The number of worker processes, by default one per CPU
+    :type processes: int | None
+    :param confidence: The confidence level of the intervals
+    :type confidence: float
+    :param min_runs: The least number of scenarios to simulate
+    :type min_runs: int
+    :type event_driven: bool
+    :param distributions: Passed on to generate_customers
+    :rtype: dict
+    """
+    profits = [[] for approach_class in DEFAULT_APPROACHES]
+    served = [[] for approach_class in DEFAULT_APPROACHES]
+    stopped_early = False
+    with multiprocessing.Pool(processes) as pool:
+        # the results come back in seed order, so where the comparison
+        # stops does not depend on the timing of the workers
+        results = pool.imap(_simulate_seed,
+                            [(seed + run, customers, event_driven,
+                              distributions) for run in range(runs)])
+        for run, rows in enumerate(results, 1):
+            for number, (profit, number_served) in enumerate(rows):
+                profits[number].append(profit)
+                served[number].append(number_served)
+            if run >= min_runs and run < runs and intervals_separate(
+                    [confidence_interval(values, confidence)
+                     for values in profits]):
+                stopped_early = True
+                break
+
+    return {"runs": len(profits[0]),
+            "stopped_early": stopped_early,
+            "confidence": confidence,
+            "approaches": [{"approach": approach_class.__name__,
+                            "profit": confidence_interval(
+                                approach_profits, confidence),
+                            "served": confidence_interval(
+                                approach_served, confidence)}
+                           for approach_class, approach_profits,
+                           approach_served
+                           in zip(DEFAULT_APPROACHES, profits, served)
+                           if len(approach_profits) > 0]}
+
+
+def _simulate_seed(arguments):
+    """Call simulate_seed with the tuple arguments, for Pool.imap.
+
+    :type arguments: tuple
+    :rtype: List[(float, int)]
+    """
+    return simulate_seed(*arguments)
+
+
+def write_report(results, report_file):
+    """Write the results of run_monte_carlo in report_file.
+
+    :type results: dict
+    :type report_file: File
+    :rtype: None
+    """
+    report_file.write("Monte Carlo comparison over {} scenarios{}, with {:.0%}"
+                      " confidence intervals:\n".format(
+                          results["runs"],
+                          " (stopped early)" if results["stopped_early"]
+                          else "", results["confidence"]))
+    for record in results["approaches"]:
+        report_file.write("{}: profit ${:.2f} +/- {:.2f}, customers served "
+                          "{:.2f} +/- {:.2f}\n".format(
+                              record["approach"], *(record["profit"] +
+                                                    record["served"])))
+
+
+def main(arguments=None):
+    """Run a Monte Carlo comparison from the command line.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare the restaurant approaches on random scenarios.")
+    parser.add_argument("--runs", type=int, default=1000,
+                        help="largest number of scenarios to simulate")
+    parser.add_argument("--min-runs", type=int, default=10,
+                        help="least number of scenarios to simulate")
+    parser.add_argument("--customers", type=int, default=1000,
+                        help="customers per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--arrival-rate", type=float, default=1.0,
+                        help="average customers per turn")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("-o", "--output", default="montecarlo_report.txt",
+                        help="file to write the report to")
+    options = parser.parse_args(arguments)
+
+    results = run_monte_carlo(options.runs, options.customers, options.seed,
+                              options.processes, options.confidence,
+                              options.min_runs,
+                              arrival_rate=options.arrival_rate)
+    with open(options.output, "w") as report_file:
+        write_report(results, report_file)
+
+
+if __name__ == "__main__":
+    main()
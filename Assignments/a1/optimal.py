@@ -0,0 +1,93 @@
+from bisect import bisect_right
+
+
+def optimal_schedule(customers):
+    """Return the best profit a single chef could make on customers, and the
+    customers served to make it.
+
+    This is an upper bound on the profit of any approach with one chef. It
+    follows the rules of Restaurant: the order of a customer is served on
+    turn entry turn + prepare time, and only if the prepare time is less
+    than the patience. A chef only starts an order when a customer enters,
+    and an order served on some turn leaves the chef free from the next
+    turn on. So a customer can be served after another if some customer
+    enters after the other is served and no later than they are.
+
+    Any choice of customers may be made, so this is weighted interval
+    scheduling. Customers that cannot be served or bring no profit are
+    pruned first. The rest are sorted by the turn they are served; the
+    customers that can be served before each one are then a prefix of that
+    order, found by binary search, and the best profit of each prefix is
+    kept. This takes O(n log n) for n customers.
+
+    :param customers: The customers of a scenario, in order of entry turn
+    :type customers: Iterable[Customer]
+    :rtype: (float, List[Customer])
+
+    >>> from customer import Customer
+    >>> profit, served = optimal_schedule([Customer("1\\t1\\t5\\t4\\t9"),
+    ...                                    Customer("2\\t2\\t3\\t1\\t9"),
+    ...                                    Customer("4\\t3\\t3\\t1\\t9")])
+    >>> profit
+    8.0
+    >>> [customer.id() for customer in served]
+    ['2', '1']
+    """
+    entry_turns = []
+    jobs = []
+    for customer in customers:
+        entry_turns.append(customer._entry_time)
+        # prune the customers who cannot be served or bring nothing
+        if customer._prepare_time < customer._patience and \
+                customer._profit > 0:
+            jobs.append((customer._entry_time + customer._prepare_time,
+                         len(jobs), customer))
+    entry_turns.sort()
+    jobs.sort()
+
+    # free_at[job] is the first turn after job is served at which a chef
+    # may start another order, since orders start when customers enter
+    free_at = []
+    for served_turn, number, customer in jobs:
+        next_entry = bisect_right(entry_turns, served_turn)
+        free_at.append(entry_turns[next_entry]
+                       if next_entry < len(entry_turns) else float("inf"))
+
+    # best[job] is the best profit of a schedule ending with job, and
+    # best_prefix[k] the job ending the best schedule among the first k jobs
+    best = []
+    previous = []
+    best_prefix = [None]
+    for served_turn, number, customer in jobs:
+        before = best_prefix[bisect_right(free_at, served_turn)]
+        previous.append(before)
+        best.append(customer._profit + (best[before] if before is not None
+                                        else 0.0))
+        last = best_prefix[-1]
+        if last is None or best[-1] > best[last]:
+            last = len(best) - 1
+        best_prefix.append(last)
+
+    served = []
+    job = best_prefix[-1]
+    while job is not None:
+        served.append(jobs[job][2])
+        job = previous[job]
+    served.reverse()
+    return (best[best_prefix[-1]] if len(served) > 0 else 0.0), served
+
+
+def optimal_profit(customers):
+    """Return the best profit a single chef could make on customers.
+
+    See optimal_schedule.
+
+    :type customers: Iterable[Customer]
+    :rtype: float
+    """
+    return optimal_schedule(customers)[0]
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,4 +1,9 @@
+import heapq
+
 from customer import Customer
+from waiting_list import QueueWaitingList, StackWaitingList, \
+    PriorityWaitingList
+
 
 class Restaurant(object):
     """A Restaurant.
@@ -10,8 +15,22 @@ class Restaurant(object):
     management style, they should be implemented here. Otherwise, they should
     be implemented in the subclasses.
 
-    This class is abstract; subclasses must implement add_customer and
-    process_turn functions.
+    The scheduling is shared by all approaches: an approach is defined by
+    the priority of its customers. When a chef is free, the waiting
+    customer with the lowest priority value is served. A customer entering
+    in the same turn as an order in progress replaces it if their priority
+    is lower, since the simulator adds customers of the same turn one at a
+    time. Customers with equal priority are served in the order they
+    entered, or newest first if newest_first is True.
+
+    A restaurant may have several chefs, each preparing one order at a
+    time. The orders in progress are kept in a heap by the turn at which
+    they are served or dropped, so processing a turn takes O(log k) for k
+    chefs. With one chef this is the restaurant of the original
+    suggestions.
+
+    This class is abstract; subclasses must implement the priority function
+    and set description.
 
     You may, if you wish, change the API of this class to add
     extra public methods or attributes. Make sure that anything
@@ -20,36 +39,267 @@ class Restaurant(object):
 
     """
 
+    # === Public Attributes ===
+    # :type description: str
+    #   Whose suggestion this approach follows, for the report
+    # :type newest_first: bool
+    #   Whether customers with equal priority are served newest first
+
     # === Private Attributes ===
-    # :type _waiting_list: List[Customer]
-    #   The list of customer currently waiting
+    # :type _waiting_list: WaitingList
+    #   The customers currently waiting, in the structure chosen by the
+    #   approach
     # :type _accumulated_profit: float
     #   The accumulated profit earned from serving customers
     # :type _number_served: int
     #   The accumulated number of customers served
-    # :type _order_in_progress: Customer
-    #   The customer whose order is being processed.
+    # :type _chefs: int
+    #   The number of orders that can be in progress at once
+    # :type _orders_in_progress: List[list]
+    #   A binary heap of [turn the order is served or dropped, start number,
+    #   customer, whether it is served] entries, one per order being
+    #   processed. The customer of an order that was replaced is None.
+    # :type _orders_started: int
+    #   The number of orders started so far, used to break ties
+    # :type _number_cooking: int
+    #   The number of orders in progress that were not replaced
+    # :type _cooking: Set[int]
+    #   The id() of the customers whose order is in progress
+    # :type _started_turn: int | None
+    #   The entry turn of the last customer added
+    # :type _started_this_turn: List[list]
+    #   The entries of the orders started in _started_turn and not replaced,
+    #   which may be replaced by a customer entering in that turn. There is
+    #   at most one per chef.
+    # :type _number_entered: int
+    #   The accumulated number of customers that entered the restaurant
+    # :type _purge_expired: bool
+    #   Whether waiting customers are dropped once their patience runs out
+    # :type _number_abandoned: int
+    #   The accumulated number of customers dropped from the waiting list
+    # :type _number_dropped: int
+    #   The accumulated number of orders dropped while in progress because
+    #   the customer ran out of patience
+    # :type _best_profit: float | None
+    #   The best profit a single chef could make on the scenario, to report
+    #   next to the total profit, or None not to report it
+    # :type _trace: ApproachTrace | None
+    #   Where to record the start and end of each order, or None not to
+    #   record them
     # TODO: Complete this part
 
-    def __init__(self):
+    description = None
+    newest_first = False
+
+    def __init__(self, purge_expired=False, chefs=1):
         """Initialize a restaurant.
+
+        :param purge_expired: Whether to drop waiting customers once their
+            patience runs out, instead of keeping them until they are
+            selected. This changes which customers are selected.
+        :type purge_expired: bool
+        :param chefs: The number of orders that can be prepared at once
+        :type chefs: int
         """
+        if chefs < 1:
+            raise ValueError("A restaurant needs at least one chef")
         self._accumulated_profit = 0.0
         self._number_served = 0
-        self._order_in_progress = None
-        self._waiting_list = []
+        self._chefs = chefs
+        self._orders_in_progress = []
+        self._orders_started = 0
+        self._number_cooking = 0
+        self._cooking = set()
+        self._started_turn = None
+        self._started_this_turn = []
+        self._waiting_list = self._new_waiting_list()
+        self._number_entered = 0
+        self._purge_expired = purge_expired
+        self._number_abandoned = 0
+        self._number_dropped = 0
+        self._best_profit = None
+        self._trace = None
+        if purge_expired:
+            self._waiting_list.track_deadlines()
         #TODO: Complete this part
 
+    def __getstate__(self):
+        """Return the state of this restaurant for pickling.
+
+        :rtype: dict
+        """
+        state = self.__dict__.copy()
+        # the customers cooking are found again from the orders in progress
+        del state["_cooking"]
+        # a trace is not carried over to the copy
+        state["_trace"] = None
+        return state
+
+    def __setstate__(self, state):
+        """Restore the state of a pickled restaurant.
+
+        :type state: dict
+        :rtype: None
+        """
+        self.__dict__.update(state)
+        self._cooking = {id(entry[2]) for entry in self._orders_in_progress
+                         if entry[2] is not None}
+
+    def priority(self, customer):
+        """
+        Return the priority of customer. Lower values are served first.
+
+        :type customer: Customer
+        :rtype: object
+        """
+        raise NotImplementedError("This is an abstract class, define or"
+                                  " use its subclass")
+
+    def _new_waiting_list(self):
+        """
+        Return the empty waiting list this restaurant keeps customers in.
+
+        This is a heap ordered by priority. Subclasses may override it with
+        a cheaper structure that serves customers in the same order.
+
+        :rtype: WaitingList
+        """
+        return PriorityWaitingList(self.priority, self.newest_first)
+
+    def _replacement(self, new_customer):
+        """
+        Return the customer to serve instead of an order in progress, once
+        new_customer, who just entered, was found to come before it.
+
+        This is new_customer, who stays in the waiting list, as the
+        suggestions using a priority waiting list always did.
+
+        :type new_customer: Customer
+        :rtype: Customer
+        """
+        return new_customer
+
+    def _comes_before(self, customer, other):
+        """
+        Return whether customer is served before other.
+
+        :type customer: Customer
+        :type other: Customer
+        :rtype: bool
+        """
+        priority = self.priority(customer)
+        other_priority = self.priority(other)
+        return priority < other_priority or \
+            (self.newest_first and priority == other_priority)
 
     def add_customer(self, new_customer):
         """
         Add a new entering customer to the restaurant.
 
+        The customer joins the waiting list, and free chefs start serving
+        the first waiting customers. If every chef is busy, the new customer
+        replaces the last of the orders entered in this same turn if they
+        come before it.
+
         :type new_customer: Customer
             The new customer that is entering the restaurant
         :rtype: None
         """
-        self._waiting_list.append(new_customer)
+        self._number_entered += 1
+        if self._purge_expired:
+            # customers that cannot be served from this turn on leave
+            if self._trace is None:
+                self._number_abandoned += \
+                    self._waiting_list.expire(new_customer.entry_turn())
+            else:
+                self._expire_traced(new_customer.entry_turn())
+        self._waiting_list.add(new_customer)
+
+        current_turn = new_customer._entry_time
+        if current_turn != self._started_turn:
+            self._started_turn = current_turn
+            self._started_this_turn = []
+
+        if self._number_cooking < self._chefs:
+            while self._number_cooking < self._chefs and \
+                    not self._waiting_list.is_empty():
+                customer = self._waiting_list.remove()
+                # a customer who replaced an order is still waiting
+                if id(customer) not in self._cooking:
+                    self._start_order(customer, current_turn)
+        else:
+            # if added by the simulator on next turn but actually entered at
+            # same time, serve the one that comes first
+            last = self._last_started_this_turn(current_turn)
+            if last is not None and \
+                    self._comes_before(new_customer, last[2]):
+                replacement = self._replacement(new_customer)
+                if self._trace is not None:
+                    self._trace.preempt(current_turn, last[2],
+                                        self._number_entered)
+                self._cooking.discard(id(last[2]))
+                self._started_this_turn.remove(last)
+                last[2] = None
+                self._number_cooking -= 1
+                self._start_order(replacement, current_turn)
+
+    def _expire_traced(self, current_turn):
+        """
+        Drop the waiting customers whose patience runs out by current_turn,
+        recording each in the trace.
+
+        :type current_turn: int
+        :rtype: None
+        """
+        dropped_customers = []
+        self._number_abandoned += \
+            self._waiting_list.expire(current_turn, dropped_customers)
+        for customer in dropped_customers:
+            self._trace.abandon(customer._entry_time + customer._patience,
+                                customer, self._number_entered)
+
+    def _last_started_this_turn(self, current_turn):
+        """
+        Return the entry of the order in progress entered in current_turn
+        that would be served last, or None if there is no such order.
+
+        :type current_turn: int
+        :rtype: list | None
+        """
+        last = None
+        for entry in self._started_this_turn:
+            if entry[2]._entry_time == current_turn and \
+                    (last is None or self._comes_before(last[2], entry[2])):
+                last = entry
+        return last
+
+    def _start_order(self, customer, current_turn):
+        """
+        Have a free chef start the order of customer in current_turn.
+
+        The order is served on the turn it is ready, if the customer has not
+        run out of patience by then; otherwise it is dropped once the
+        patience is reached.
+
+        :type customer: Customer
+        :type current_turn: int
+        :rtype: None
+        """
+        ready_turn = customer._entry_time + customer._prepare_time
+        if customer._prepare_time < customer._patience and \
+                ready_turn >= current_turn:
+            entry = [ready_turn, self._orders_started, customer, True]
+        else:
+            entry = [max(current_turn,
+                         customer._entry_time + customer._patience),
+                     self._orders_started, customer, False]
+        heapq.heappush(self._orders_in_progress, entry)
+        self._orders_started += 1
+        self._number_cooking += 1
+        self._cooking.add(id(customer))
+        self._started_this_turn.append(entry)
+        if self._trace is not None:
+            self._trace.start(current_turn, customer, self._number_entered)
 
     def process_turn(self, current_turn):
         """Process the current_turn.
@@ -67,18 +317,139 @@ class Restaurant(object):
         :param current_turn: The number indicating current turn
         :rtype: None
         """
-        # currently no customer, do nothing
-        if self._order_in_progress is not None:
-            # not reached patience
-            if self._order_in_progress._patience > \
-                    current_turn - self._order_in_progress._entry_time:
-                if self._order_in_progress._prepare_time == \
-                        current_turn - self._order_in_progress._entry_time:
-                    self._accumulated_profit += self._order_in_progress._profit
-                    self._number_served += 1
-                    self._order_in_progress = None
+        # finish the orders that are ready or out of patience by now
+        while len(self._orders_in_progress) > 0 and \
+                self._orders_in_progress[0][0] <= current_turn:
+            event_turn, number, customer, served = \
+                heapq.heappop(self._orders_in_progress)
+            # skip orders that were replaced
+            if customer is None:
+                continue
+            self._number_cooking -= 1
+            self._cooking.discard(id(customer))
+            if served:
+                self._accumulated_profit += customer._profit
+                self._number_served += 1
             else:
-                self._order_in_progress = None
+                self._number_dropped += 1
+            if self._trace is not None:
+                if served:
+                    self._trace.finish(event_turn, customer,
+                                       self._number_entered)
+                else:
+                    self._trace.abandon(event_turn, customer,
+                                        self._number_entered)
+
+    def total_profit(self):
+        """Return the profit this restaurant has earned so far.
+
+        :type self: Restaurant
+        :rtype: float
+        """
+        return self._accumulated_profit
+
+    def number_served(self):
+        """Return the number of customers this restaurant has served so far.
+
+        :type self: Restaurant
+        :rtype: int
+        """
+        return self._number_served
+
+    def number_unserved(self):
+        """Return the number of customers that entered but were not served.
+
+        :type self: Restaurant
+        :rtype: int
+        """
+        return self._number_entered - self._number_served
+
+    def number_abandoned(self):
+        """Return the number of customers dropped from the waiting list
+        because their patience ran out.
+
+        This is always 0 unless expired customers are purged.
+
+        :type self: Restaurant
+        :rtype: int
+        """
+        return self._number_abandoned
+
+    def number_dropped(self):
+        """Return the number of orders dropped while in progress because the
+        customer ran out of patience.
+
+        :type self: Restaurant
+        :rtype: int
+        """
+        return self._number_dropped
+
+    def number_waiting(self):
+        """Return the number of customers in the waiting list.
+
+        :type self: Restaurant
+        :rtype: int
+        """
+        return len(self._waiting_list)
+
+    def number_in_progress(self):
+        """Return the number of orders in progress, at most one per chef.
+
+        :type self: Restaurant
+        :rtype: int
+        """
+        return self._number_cooking
+
+    def is_idle(self):
+        """Return whether no order is in progress.
+
+        :type self: Restaurant
+        :rtype: bool
+        """
+        return self._number_cooking == 0
+
+    def set_best_profit(self, best_profit):
+        """Report best_profit as the best possible profit on the scenario.
+
+        :type self: Restaurant
+        :param best_profit: The best profit a single chef could make, as
+            given by optimal.optimal_profit
+        :type best_profit: float
+        :rtype: None
+        """
+        self._best_profit = best_profit
+
+    def set_trace(self, trace):
+        """Record the start and end of each order in trace from now on.
+
+        :type self: Restaurant
+        :param trace: Where to record the events, as given by
+            event_trace.TraceWriter, or None to stop recording them
+        :type trace: ApproachTrace | None
+        :rtype: None
+        """
+        self._trace = trace
+
+    def next_event_turn(self, current_turn):
+        """Return the next turn at which process_turn has something to do.
+
+        Calling process_turn on any turn from current_turn up to (but not
+        including) the returned turn leaves this restaurant unchanged, so a
+        simulator may skip those turns. Return None if nothing will happen
+        until another customer is added.
+
+        :type self: Restaurant
+        :type current_turn: int
+        :param current_turn: The first turn that has not been processed yet
+        :rtype: int | None
+        """
+        # forget the orders that were replaced
+        while len(self._orders_in_progress) > 0 and \
+                self._orders_in_progress[0][2] is None:
+            heapq.heappop(self._orders_in_progress)
+        if len(self._orders_in_progress) == 0:
+            return None
+        return max(current_turn, self._orders_in_progress[0][0])
 
     def write_report(self, report_file):
         """
@@ -90,7 +461,15 @@ class Restaurant(object):
         :rtype: None
         """
 
+        report_file.write("Results for the serving approach using {}:\n"
+                          .format(self.description))
         report_file.write("Total profit: ${} \nCustomer served: {}\n".format(self._accumulated_profit, self._number_served))
+        if self._purge_expired:
+            report_file.write("Customer unserved: {}\n".format(
+                self.number_unserved()))
+        if self._best_profit is not None:
+            report_file.write("Best possible profit for one chef: ${}\n"
+                              .format(self._best_profit))
         #TODO: Complete this part
 
 
@@ -98,44 +477,32 @@ class PatApproach(Restaurant):
     """A Restaurant with Pat management style.
 
     This class represents a restaurant that uses the Pat management style,
-    in which customers are served based on their arrival time. This class is
-    a subclass of Restaurant and implements two functions: write_report and
-    add_customer.
-
+    in which customers are served based on their arrival time.
     """
     # FIFO, Queue structure
 
-    def add_customer(self, new_customer):
-        """
-        Add a new customer to the restaurant waiting list and preparation list, if no order is being processed, with the first one being served first.
+    description = "Pat's suggestion"
 
-        Extends from Restaurant.add_customer
+    def priority(self, customer):
+        """
+        Return the priority of customer, the earliest arrival first.
 
-        :@type new_customer: Customer
-        :@param new_customer: The new customer that is entering the restaurant.
-        :@rtype: None
+        Overrides Restaurant.priority
 
+        :type customer: Customer
+        :rtype: int
         """
-        super().add_customer(new_customer)
-        # if no order being processed, add new customer based on first arrival
-        if self._order_in_progress is None:
-            self._order_in_progress = self._waiting_list.pop(0)
-
+        return customer._entry_time
 
-    def write_report(self, report_file):
+    def _new_waiting_list(self):
         """
-        Write the final report of Pat restaurant approach in the report_file.
+        Return an empty queue waiting list.
 
-        Extends from Restaurant.write_report
+        Overrides Restaurant._new_waiting_list
 
-        :type self: PatApproach
-        :type report_file: file
-        :param report_file: This is an open file that PatApproach writes the report into.
-        :rtype: None
+        :rtype: WaitingList
         """
-
-        report_file.write("Results for the serving approach using Pat's suggestion:\n")
-        super().write_report(report_file)
+        return QueueWaitingList()
 
 
 class MatApproach(Restaurant):
@@ -143,44 +510,44 @@ class MatApproach(Restaurant):
     A Restaurant with Mat management style.
 
     This class represents a restaurant that uses the Mat management style, in which customers are served on their arrival time, serving the last one in line.
-    This class is a subclass of Restaurant and implements write_report and process_turn.
-
     """
     #LIFO, Stack structure
 
-    def add_customer(self, new_customer):
+    description = "Mat's suggestion"
+    newest_first = True
+
+    def priority(self, customer):
         """
-        Add a new customer to the restaurant waiting list and preparation list, if no order is being processed, with the last one being served first.
+        Return the priority of customer, the latest arrival first.
 
-        Extends from Restaurant.add_customer
+        Overrides Restaurant.priority
 
-        :@type new_customer: Customer
-        :@param new_customer: The new customer that is entering the restaurant.
-        :@rtype: None
+        :type customer: Customer
+        :rtype: int
+        """
+        return -customer._entry_time
 
+    def _new_waiting_list(self):
         """
-        super().add_customer(new_customer)
-        # if no order being processed, add new customer from the last arrival
-        if self._order_in_progress is None or \
-                new_customer._entry_time == self._order_in_progress._entry_time:
-            # replaced by the lastest in line but arrived at same time
-            # due to simulator only adding 1 customer per turn
-            # but multiple people could have arrived at the same time
-            self._order_in_progress = self._waiting_list.pop(-1)
+        Return an empty stack waiting list.
 
-    def write_report(self, report_file):
+        Overrides Restaurant._new_waiting_list
+
+        :rtype: WaitingList
         """
-        Write the final report of Pat restaurant approach in the report_file.
+        return StackWaitingList()
 
-        Extends from Restaurant.write_report.
+    def _replacement(self, new_customer):
+        """
+        Return new_customer, who just entered, taking them off the top of
+        the stack.
 
-        :type report_file: file
-        :type self: MatApproach
-        :param report_file:  This is an open file that MatApproach write the report into.
-        :rtype: None
+        Overrides Restaurant._replacement
+
+        :type new_customer: Customer
+        :rtype: Customer
         """
-        report_file.write("Results for the serving approach using Mat's suggestion:\n")
-        super().write_report(report_file)
+        return self._waiting_list.remove()
 
 
 class MaxApproach(Restaurant):
@@ -188,109 +555,92 @@ class MaxApproach(Restaurant):
     A Restaurant with Max management style.
 
     This class represents a restaurant that uses the Max management style, in which customers are served on their profit, serving the one with highest profit first.
-    This class is a subclass of Restaurant and implements write_report and process_turn.
-
     """
     # priority queue on profit.
 
-    def add_customer(self, new_customer):
-        """
-        Add a new customer to the restaurant waiting list and preparation list,
-        if no oder is being processed, with the one with the highest profit being served first.
-
-        :@type new_customer: Customer
-        :@param new_customer: The new customer that is entering the restaurant.
-        :@rtype: None
-        """
-        super().add_customer(new_customer)
-        # if no order being processed
-        if self._order_in_progress is None:
-            # get the one with highest profit
-            ind = 0
-            for i in range(len(self._waiting_list)):
-                if self._waiting_list[i]._profit \
-                        > self._waiting_list[ind]._profit:
-                    ind = i
-            # after loop, ind directs to one with highest profit
-            self._order_in_progress = self._waiting_list.pop(ind)
-
-        # if added by the simulator on next turn but actually entered at same time
-        # serve the one with highest profit first
-        elif new_customer._entry_time == self._order_in_progress._entry_time \
-            and new_customer._profit > self._order_in_progress._profit:
-            self._order_in_progress = new_customer
+    description = "Max's suggestion"
 
-    def write_report(self, report_file):
+    def priority(self, customer):
         """
-        Write the final report of Max restaurant appraoch in the report_file.
+        Return the priority of customer, the highest profit first.
 
-        Extends from Restaurant.write_report
+        Overrides Restaurant.priority
 
-        :type self: MaxApproach
-        :type report_file: file
-        :param report_file: This is an open file that MaxApproach writes the report into
-        :rtype: None
+        :type customer: Customer
+        :rtype: float
         """
+        return -customer._profit
 
-        report_file.write("Results for the serving approach using Max's suggestion:\n")
-        super().write_report(report_file)
 
 class PacApproach(Restaurant):
     """
     A Restaurant with Pac management style.
 
     This class represents a restaurant that uses the Pac management style,
-    in which customers are served based on their arrival time.
-    This class is a subclass of Restaurant and implements two functions:
-    write_report and add_customer.
-
+    in which customers are served on their preparation time, serving the
+    one with the shortest preparation time first.
     """
     # priority queue on prepare_time
 
-    def add_customer(self, new_customer):
+    description = "Pac's suggestion"
+
+    def priority(self, customer):
         """
-        Add a new customer to the restaurant waiting list and preparation list,
-        if no order is being processed, with the one with the shortest preparation time being served first.
-
-        :@type new_customer: Customer
-        :@param new_customer: The new customer that is entering the restaurant.
-        :@rtype: None
-        """
-        super().add_customer(new_customer)
-        # if no order is being processed
-        if self._order_in_progress is None:
-            # get the one with the shortest serving time
-            ind = 0
-            for i in range(len(self._waiting_list)):
-                if self._waiting_list[i]._prepare_time \
-                        < self._waiting_list[ind]._prepare_time:
-                    ind = i
-            # after loop, ind directs to the one with lowest serving time
-            self._order_in_progress = self._waiting_list.pop(ind)
-        # if added by the simulator on next turn but actually entered at same time
-        # serve the one with lowest serving time first
-        elif new_customer._entry_time == self._order_in_progress._entry_time \
-                and new_customer._prepare_time \
-                < self._order_in_progress._prepare_time:
-            self._order_in_progress = new_customer
+        Return the priority of customer, the shortest preparation first.
 
-    def write_report(self, report_file):
+        Overrides Restaurant.priority
+
+        :type customer: Customer
+        :rtype: int
         """
-        Write the final report of Pac restaurant appraoch in the report_file.
+        return customer._prepare_time
 
-        Extends from Restaurant.write_report
 
-        :type self: PacApproach
-        :type report_file: file
-        :param report_file: This is an open file that MaxApproach writes the report into
-        :rtype: None
+class RateApproach(Restaurant):
+    """
+    A Restaurant serving the highest profit per turn of preparation first.
+    """
+
+    description = "the highest profit per prepare turn"
+
+    def priority(self, customer):
+        """
+        Return the priority of customer, the highest profit per turn first.
+
+        An order needing no preparation counts as taking one turn.
+
+        Overrides Restaurant.priority
+
+        :type customer: Customer
+        :rtype: float
+        """
+        return -customer._profit / max(customer._prepare_time, 1)
+
+
+class DeadlineApproach(Restaurant):
+    """
+    A Restaurant serving the customer who will run out of patience first.
+    """
+
+    description = "the earliest deadline first"
+
+    def priority(self, customer):
         """
+        Return the priority of customer, the earliest deadline first.
+
+        Overrides Restaurant.priority
+
+        :type customer: Customer
+        :rtype: int
+        """
+        return customer._entry_time + customer._patience
+
+
+# The approaches simulated when no others are given, in report order
+DEFAULT_APPROACHES = (PatApproach, MatApproach, MaxApproach, PacApproach)
 
-        report_file.write("Results for the serving approach using Pac's suggestion:\n")
-        super().write_report(report_file)
 
 #TODO: Complete this part
 if __name__ == "__main__":
     import doctest
     doctest.testmod()
-
@@ -0,0 +1,162 @@
+import hashlib
+import importlib
+import os
+import pickle
+import shutil
+import sys
+
+from disk_cache import DiskCache
+from scenario_cache import cached_content_hash
+
+# The modules the report of a simulation depends on, besides the modules
+# defining the approaches simulated
+_MODULES = ("customer", "waiting_list", "restaurant", "scenario", "optimal",
+            "simulator")
+
+
+def code_version(approaches):
+    """Return a hash of the source of the modules the report of simulating
+    approaches depends on, as a hex string.
+
+    Any change to the simulation code, or to the code of the approaches,
+    gives another code version.
+
+    :type approaches: List[Restaurant]
+    :rtype: str
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    names = set(_MODULES)
+    names.update(type(approach).__module__ for approach in approaches)
+    for name in sorted(names):
+        digest.update(name.encode() + b"\0")
+        module = sys.modules.get(name)
+        if module is None:
+            module = importlib.import_module(name)
+        # an approach defined interactively has no source file to hash
+        file_name = getattr(module, "__file__", None)
+        if file_name is not None:
+            with open(file_name, "rb") as source_file:
+                digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """A ResultCache.
+
+    This class keeps the reports of simulations on disk, so that simulating
+    the same approaches on the same scenario again copies the report
+    instead of running the simulation.
+
+    A report is stored by a key hashing the content of the scenario files,
+    the approaches simulated with their configuration, the options that
+    change the report, and the code version of the simulation. Changing any
+    of them misses the cache. The cache has a size cap, and optionally a cap
+    on its number of reports, and evicts the least recently used reports.
+    The content hashes of the scenario files are cached apart, in the
+    hashes subfolder, so they do not count against the caps.
+
+    >>> import os, tempfile
+    >>> from restaurant import PatApproach
+    >>> folder = tempfile.mkdtemp()
+    >>> scenario_file_name = os.path.join(folder, "scenario.txt")
+    >>> with open(scenario_file_name, "w") as scenario_file:
+    ...     _ = scenario_file.write("1\\t1\\t5\\t2\\t9\\n")
+    >>> cache = ResultCache(os.path.join(folder, "results"))
+    >>> key = cache.key([scenario_file_name], [PatApproach()])
+    >>> key == cache.key([scenario_file_name], [PatApproach()])
+    True
+    >>> key == cache.key([scenario_file_name], [PatApproach(True)])
+    False
+    """
+
+    # === Private Attributes ===
+    # :type _cache: DiskCache
+    #   The reports
+    # :type _hashes: DiskCache
+    #   The content hash of each scenario file seen
+    # :type _hits: int
+    #   The number of fetches that found the report
+    # :type _misses: int
+    #   The number of fetches that did not
+
+    def __init__(self, folder, max_bytes=1 << 26, max_entries=None):
+        """Initialize a cache of reports in folder.
+
+        :param folder: The folder to keep the reports in
+        :type folder: str
+        :param max_bytes: The largest total size of the reports
+        :type max_bytes: int
+        :param max_entries: The largest number of reports in the cache, or
+            None for no limit
+        :type max_entries: int | None
+        """
+        self._cache = DiskCache(folder, max_bytes, max_entries)
+        # each hash takes a few dozen bytes
+        self._hashes = DiskCache(os.path.join(folder, "hashes"), 1 << 20)
+        self._hits = 0
+        self._misses = 0
+
+    def key(self, scenario_file_names, approaches, best_profit=False):
+        """Return the key of the report of simulating approaches on the
+        scenario in scenario_file_names, as a hex string.
+
+        :param scenario_file_names: The files of the scenario, in order
+        :type scenario_file_names: List[str]
+        :param approaches: The approaches simulated, as they are before the
+            simulation
+        :type approaches: List[Restaurant]
+        :param best_profit: Whether the best possible profit is reported
+        :type best_profit: bool
+        :rtype: str
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(code_version(approaches).encode())
+        for scenario_file_name in scenario_file_names:
+            digest.update(cached_content_hash(self._hashes,
+                                              scenario_file_name).encode())
+        # the pickled approaches give their classes and configuration
+        digest.update(pickle.dumps((approaches, best_profit), protocol=4))
+        return digest.hexdigest()
+
+    def fetch(self, key, report_file_name):
+        """Copy the report stored under key to report_file_name.
+
+        Return whether the cache held the report.
+
+        :type key: str
+        :type report_file_name: str
+        :rtype: bool
+        """
+        cached_file_name = self._cache.lookup(key + ".txt")
+        if cached_file_name is None:
+            self._misses += 1
+            return False
+        self._hits += 1
+        shutil.copyfile(cached_file_name, report_file_name)
+        return True
+
+    def store(self, key, report_file_name):
+        """Store the report in report_file_name under key.
+
+        :type key: str
+        :type report_file_name: str
+        :rtype: None
+        """
+        self._cache.store(key + ".txt", lambda name: shutil.copyfile(
+            report_file_name, name))
+
+    def stats(self):
+        """Return the hit and miss counts of the fetches from this cache, and
+        the eviction count, number of reports and size of the reports.
+
+        :rtype: dict
+        """
+        stats = self._cache.stats()
+        stats["hits"] = self._hits
+        stats["misses"] = self._misses
+        return stats
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
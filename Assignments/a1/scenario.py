@@ -0,0 +1,789 @@
+import argparse
+import mmap
+import re
+import struct
+import sys
+from array import array
+from itertools import accumulate, islice, repeat
+from multiprocessing import shared_memory
+
+from customer import Customer
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Scenario:
+    """A Scenario stored in columns.
+
+    This class stores the customers of a simulation scenario as parallel
+    typed arrays, one per customer attribute, instead of one Customer object
+    per customer. The ids are kept together in one byte string. Each
+    customer takes about 40 bytes this way.
+
+    Rows are numbered from 0 in scenario order. The attributes of a row can
+    be read directly, and iterating over a Scenario yields a short-lived
+    Customer view of each row, so it can be simulated like a list of
+    customers.
+
+    A Scenario can also be a read-only view of a binary scenario file mapped
+    in memory, see map_scenario, or of a shared memory block, see
+    SharedScenario. Its columns are then copied into arrays the first time
+    customers are added to it, and release gives back its views of the
+    file or block.
+    """
+
+    # === Private Attributes ===
+    # :type _entry_times: array
+    #   The entry turn of each customer, as signed 64 bit integers
+    # :type _profits: array
+    #   The profit of each customer, as doubles
+    # :type _prepare_times: array
+    #   The prepare time of each customer, as signed 64 bit integers
+    # :type _patiences: array
+    #   The patience of each customer, as signed 64 bit integers
+    # :type _id_ends: array
+    #   _id_ends[row] is where the id of row ends in _ids, and
+    #   _id_ends[row - 1] (or 0) is where it starts
+    # :type _ids: bytearray | memoryview
+    #   The ids of all customers, encoded in UTF-8 and joined together
+    # :type _file_name: str | None
+    #   The name of the binary scenario file this scenario is mapped from,
+    #   or None if it is not mapped
+    # :type _shared_name: str | None
+    #   The name of the shared memory block this scenario views, or None if
+    #   it is not shared
+    # :type _block: SharedMemory | None
+    #   The shared memory block this scenario views, kept open until the
+    #   scenario is released. It is the last attribute, so that the views of
+    #   the block are released before it is closed when the scenario is
+    #   discarded.
+
+    def __init__(self):
+        """Initialize an empty scenario.
+
+        >>> s = Scenario()
+        >>> s.append(3, "38623", 11.0, 8, 3)
+        >>> len(s)
+        1
+        >>> s.customer(0) == Customer("3\t38623\t11\t8\t3")
+        True
+        """
+        self._entry_times = array("q")
+        self._profits = array("d")
+        self._prepare_times = array("q")
+        self._patiences = array("q")
+        self._id_ends = array("q")
+        self._ids = bytearray()
+        self._file_name = None
+        self._shared_name = None
+        self._block = None
+
+    def _unmap(self):
+        """Copy the columns of a mapped scenario into arrays it owns.
+
+        :rtype: None
+        """
+        # a scenario transformed from a mapped one still shares its ids
+        if isinstance(self._ids, memoryview):
+            self._entry_times = array("q", self._entry_times)
+            self._profits = array("d", self._profits)
+            self._prepare_times = array("q", self._prepare_times)
+            self._patiences = array("q", self._patiences)
+            self._id_ends = array("q", self._id_ends)
+            self._ids = bytearray(self._ids)
+            self._file_name = None
+            self._shared_name = None
+            self._block = None
+
+    def release(self):
+        """Release the views of a mapped file or shared memory block held by
+        this scenario, and close the block.
+
+        The scenario is empty afterwards, and so are the scenarios
+        transformed from it, which share its views. A scenario attached to a
+        shared memory block should be released once it is no longer
+        simulated: views still in use, such as those of an unfinished
+        customers() generator, would otherwise keep the block from being
+        closed.
+
+        :rtype: None
+
+        >>> s = parse_scenario("1\t1\t5\t2\t3\\n")
+        >>> with SharedScenario(s) as shared:
+        ...     attached = shared.scenario()
+        ...     attached.release()
+        >>> len(attached)
+        0
+        """
+        if isinstance(self._ids, memoryview):
+            for column in _numeric_columns(self) + [self._ids]:
+                if isinstance(column, memoryview):
+                    column.release()
+            if self._block is not None:
+                self._block.close()
+            self.__init__()
+
+    def __getstate__(self):
+        """Return the state to pickle this scenario with.
+
+        A mapped scenario is pickled as its file name, and a shared one as
+        the name of its block, so that another process maps the same file
+        or attaches to the same block instead of receiving a copy.
+
+        :rtype: dict
+        """
+        if self._file_name is not None:
+            return {"_file_name": self._file_name}
+        if self._shared_name is not None:
+            return {"_shared_name": self._shared_name}
+        state = self.__dict__.copy()
+        state["_block"] = None
+        if isinstance(self._ids, memoryview):
+            # columns shared with a mapped scenario are copied
+            for name, typecode, column in zip(_COLUMN_NAMES, _TYPECODES,
+                                              _numeric_columns(self)):
+                state[name] = array(typecode, column)
+            state["_ids"] = bytearray(self._ids)
+        return state
+
+    def __setstate__(self, state):
+        """Restore this scenario from state.
+
+        :type state: dict
+        :rtype: None
+        """
+        if state.get("_file_name") is not None:
+            self.__dict__.update(map_scenario(state["_file_name"]).__dict__)
+        elif state.get("_shared_name") is not None:
+            self.__dict__.update(
+                attach_scenario(state["_shared_name"]).__dict__)
+        else:
+            self.__dict__.update(state)
+
+    def append(self, entry_time, id, profit, prepare_time, patience):
+        """Add a customer with the given attributes at the end.
+
+        :type entry_time: int
+        :type id: str
+        :type profit: float
+        :type prepare_time: int
+        :type patience: int
+        :rtype: None
+        """
+        self._unmap()
+        self._entry_times.append(entry_time)
+        self._profits.append(profit)
+        self._prepare_times.append(prepare_time)
+        self._patiences.append(patience)
+        self._ids += id.encode()
+        self._id_ends.append(len(self._ids))
+
+    def extend(self, other):
+        """Add all customers of the scenario other at the end.
+
+        :type other: Scenario
+        :rtype: None
+        """
+        self._unmap()
+        offset = len(self._ids)
+        self._entry_times.extend(other._entry_times)
+        self._profits.extend(other._profits)
+        self._prepare_times.extend(other._prepare_times)
+        self._patiences.extend(other._patiences)
+        self._id_ends.extend(end + offset for end in other._id_ends)
+        self._ids += other._ids
+
+    def transformed(self, profit_scale=1.0, prepare_scale=1.0,
+                    prepare_offsets=None, patience_scale=1.0):
+        """Return a copy of this scenario with some columns transformed.
+
+        Profits are multiplied by profit_scale. Prepare times are multiplied
+        by prepare_scale, shifted by the offset of their row in
+        prepare_offsets, and rounded to whole turns of at least 0.
+        Patiences are multiplied by patience_scale and rounded likewise.
+
+        Only the transformed columns are new; the others, such as the entry
+        turns and ids, are shared with this scenario.
+
+        :type profit_scale: float
+        :type prepare_scale: float
+        :param prepare_offsets: The turns added to the prepare time of each
+            row, or None to add none
+        :type prepare_offsets: Sequence[int] | None
+        :type patience_scale: float
+        :rtype: Scenario
+
+        >>> s = parse_scenario("1\t1\t5\t2\t3\\n2\t2\t5\t2\t9\\n")
+        >>> t = s.transformed(profit_scale=2, prepare_offsets=[1, -3],
+        ...                   patience_scale=0.5)
+        >>> [(t.profit(row), t.prepare_time(row), t.patience(row))
+        ...  for row in range(len(t))]
+        [(10.0, 3, 2), (10.0, 0, 4)]
+        """
+        scenario = Scenario()
+        scenario.__dict__.update(self.__dict__)
+        if profit_scale != 1 or prepare_scale != 1 or \
+                prepare_offsets is not None or patience_scale != 1:
+            # it no longer matches the mapped file or shared block
+            scenario._file_name = None
+            scenario._shared_name = None
+        if profit_scale != 1:
+            scenario._profits = array("d", [profit * profit_scale
+                                            for profit in self._profits])
+        if prepare_scale != 1 or prepare_offsets is not None:
+            if prepare_offsets is None:
+                prepare_offsets = repeat(0)
+            scenario._prepare_times = array(
+                "q", [max(0, round(prepare_time * prepare_scale) + offset)
+                      for prepare_time, offset
+                      in zip(self._prepare_times, prepare_offsets)])
+        if patience_scale != 1:
+            scenario._patiences = array(
+                "q", [max(0, round(patience * patience_scale))
+                      for patience in self._patiences])
+        return scenario
+
+    def __len__(self):
+        """Return the number of customers in this scenario.
+
+        :rtype: int
+        """
+        return len(self._entry_times)
+
+    def entry_turn(self, row):
+        """Return the entry turn of the customer in row.
+
+        :type row: int
+        :rtype: int
+        """
+        return self._entry_times[row]
+
+    def id(self, row):
+        """Return the id of the customer in row.
+
+        :type row: int
+        :rtype: str
+        """
+        start = self._id_ends[row - 1] if row > 0 else 0
+        return str(self._ids[start:self._id_ends[row]], "utf-8")
+
+    def profit(self, row):
+        """Return the profit of the customer in row.
+
+        :type row: int
+        :rtype: float
+        """
+        return self._profits[row]
+
+    def prepare_time(self, row):
+        """Return the prepare time of the customer in row.
+
+        :type row: int
+        :rtype: int
+        """
+        return self._prepare_times[row]
+
+    def patience(self, row):
+        """Return the patience of the customer in row.
+
+        :type row: int
+        :rtype: int
+        """
+        return self._patiences[row]
+
+    def customer(self, row):
+        """Return a Customer view of row.
+
+        :type row: int
+        :rtype: Customer
+        """
+        return Customer.from_fields(self._entry_times[row], self.id(row),
+                                    self._profits[row],
+                                    self._prepare_times[row],
+                                    self._patiences[row])
+
+    def __iter__(self):
+        """Yield a Customer view of each row, in scenario order.
+
+        :rtype: Iterator[Customer]
+        """
+        return self.customers()
+
+    def customers(self, first_row=0):
+        """Yield a Customer view of each row from first_row on, in order.
+
+        The rows before first_row are skipped without creating customers.
+
+        :type first_row: int
+        :rtype: Iterator[Customer]
+
+        >>> s = parse_scenario("1\t1\t5\t2\t3\\n2\t2\t5\t2\t9\\n")
+        >>> [c.id() for c in s.customers(1)]
+        ['2']
+        """
+        ids = self._ids
+        start = self._id_ends[first_row - 1] if first_row > 0 else 0
+        for entry_time, end, profit, prepare_time, patience in zip(
+                *(islice(column, first_row, None)
+                  for column in (self._entry_times, self._id_ends,
+                                 self._profits, self._prepare_times,
+                                 self._patiences))):
+            yield Customer.from_fields(entry_time, str(ids[start:end], "utf-8"),
+                                       profit, prepare_time, patience)
+            start = end
+
+
+def read_scenario(scenario_file_name):
+    """Return the scenario in scenario_file_name stored in columns.
+
+    The whole file is parsed in one pass by parse_scenario.
+
+    :param scenario_file_name: Name of a tab separated scenario file
+    :type scenario_file_name: str
+    :rtype: Scenario
+    """
+    with open(scenario_file_name) as scenario_file:
+        return parse_scenario(scenario_file.read())
+
+
+def parse_scenario(text):
+    """Return the scenario described by text stored in columns.
+
+    Each non-blank line of text describes one customer with five fields
+    separated by white space, as for Customer. Each column is converted in
+    bulk, with NumPy when it is installed. A ValueError naming the first
+    malformed line is raised if any line is malformed.
+
+    :type text: str
+    :rtype: Scenario
+
+    >>> s = parse_scenario("1\t23215\t13\t4\t8\\n3\t38623\t11\t8\t3\\n")
+    >>> [c.id() for c in s]
+    ['23215', '38623']
+    >>> s.profit(0)
+    13.0
+    >>> parse_scenario("1\t23215\t13\t4\t8\\n3\t38623\televen\t8\t3\\n")
+    Traceback (most recent call last):
+    ...
+    ValueError: line 2: could not convert 'eleven' to a profit
+    """
+    # Split the whole text at once, with a marker token ending each line.
+    # If every line has five fields, the markers are every sixth token.
+    if not text.endswith("\n"):
+        text += "\n"
+    tokens = text.replace("\n", " \0 ").split()
+    rows = len(tokens) // 6
+    if len(tokens) % 6 == 0 and tokens.count("\0") == rows and \
+            tokens[5::6].count("\0") == rows:
+        columns = [tokens[field::6] for field in range(5)]
+    else:
+        # there are blank or malformed lines, so go line by line
+        lines = [fields for fields in map(str.split, text.splitlines())
+                 if fields]
+        if len(lines) == 0:
+            return Scenario()
+        if set(map(len, lines)) != {5}:
+            _raise_malformed(text)
+        columns = list(zip(*lines))
+
+    entry_times, ids, profits, prepare_times, patiences = columns
+    try:
+        columns = (_integers(entry_times), array("d", map(float, profits)),
+                   _integers(prepare_times), _integers(patiences))
+    except (ValueError, OverflowError):
+        _raise_malformed(text)
+
+    scenario = Scenario()
+    (scenario._entry_times, scenario._profits, scenario._prepare_times,
+     scenario._patiences) = columns
+    scenario._ids = bytearray("".join(ids).encode())
+    if len(scenario._ids) == sum(map(len, ids)):
+        # all ids are ASCII, so characters and bytes line up
+        scenario._id_ends = array("q", accumulate(map(len, ids)))
+    else:
+        scenario._id_ends = array("q", accumulate(len(id.encode())
+                                                  for id in ids))
+    return scenario
+
+
+# An integer field: digits with an optional sign. A column of them is
+# checked at once, joined by spaces, so every backend accepts the same input.
+_INTEGER = r"[-+]?[0-9]+"
+_INTEGER_COLUMN = re.compile("{0}(?: {0})*".format(_INTEGER))
+
+
+def _integers(values):
+    """Return the integer strings in values converted into an array.
+
+    A ValueError is raised if any value is not an integer field. NumPy, when
+    it is installed, converts integers about twice as fast as int, but not
+    floats, so it is only used for the integer columns. It saturates
+    integers out of the 64 bit range instead of failing, so the saturated
+    values are checked after the conversion.
+
+    :type values: Sequence[str]
+    :rtype: array
+
+    >>> _integers(["3", "-1", "+2"]).tolist()
+    [3, -1, 2]
+    >>> _integers(["3", "-"])
+    Traceback (most recent call last):
+    ...
+    ValueError: not an integer column
+    """
+    joined = " ".join(values)
+    if "-" in joined or "+" in joined:
+        valid = _INTEGER_COLUMN.fullmatch(joined) is not None
+    else:
+        # much faster than the regular expression, for the usual columns
+        digits = joined.replace(" ", "")
+        valid = digits.isascii() and digits.isdigit()
+    if not valid:
+        raise ValueError("not an integer column")
+    if numpy is None:
+        return array("q", map(int, values))
+    integers = numpy.fromstring(joined, dtype=numpy.int64, sep=" ")
+    limits = numpy.iinfo(numpy.int64)
+    for position in numpy.flatnonzero((integers == limits.max) |
+                                      (integers == limits.min)):
+        if int(values[position]) != integers[position]:
+            raise OverflowError("value out of range")
+    column = array("q")
+    column.frombytes(integers.tobytes())
+    return column
+
+
+# The name and conversion of each field of a scenario line, in order
+_FIELDS = (("an entry turn", int), ("an id", str), ("a profit", float),
+           ("a prepare time", int), ("a patience", int))
+
+
+def _raise_malformed(text):
+    """Raise a ValueError describing the first malformed line of text.
+
+    :type text: str
+    :rtype: None
+
+    >>> _raise_malformed("1 1 5 2 9\\n2 2 5 99999999999999999999 9")
+    Traceback (most recent call last):
+    ...
+    ValueError: line 2: '99999999999999999999' is out of range for a prepare time
+    """
+    for line_number, line in enumerate(text.splitlines(), 1):
+        fields = line.split()
+        if len(fields) == 0:
+            continue
+        if len(fields) != len(_FIELDS):
+            raise ValueError("line {}: expected {} fields but found {}".format(
+                line_number, len(_FIELDS), len(fields)))
+        for field, (name, convert) in zip(fields, _FIELDS):
+            try:
+                if convert is int and not re.fullmatch(_INTEGER, field):
+                    raise ValueError(field)
+                value = convert(field)
+            except ValueError:
+                raise ValueError("line {}: could not convert {!r} to {}"
+                                 .format(line_number, field, name)) from None
+            if convert is int and not -1 << 63 <= value < 1 << 63:
+                raise ValueError("line {}: {!r} is out of range for {}"
+                                 .format(line_number, field, name))
+    raise ValueError("scenario has a value out of range")
+
+
+# A binary scenario file starts with _MAGIC and a header giving the number
+# of customers and the length of the joined ids. The header is followed by
+# the entry time, profit, prepare time, patience and id end columns, each
+# of which is the customers' values as little-endian 8 byte numbers, and
+# then by the joined ids. Every column starts at a multiple of 8 bytes.
+_MAGIC = b"CSC148S\x01"
+_HEADER = struct.Struct("<8sqq")
+_TYPECODES = "qdqqq"
+
+
+def is_binary_scenario(scenario_file_name):
+    """Return whether scenario_file_name is a binary scenario file.
+
+    :type scenario_file_name: str
+    :rtype: bool
+    """
+    with open(scenario_file_name, "rb") as scenario_file:
+        return scenario_file.read(len(_MAGIC)) == _MAGIC
+
+
+def write_binary_scenario(scenario, binary_file_name):
+    """Write scenario to binary_file_name in the binary scenario format.
+
+    :type scenario: Scenario
+    :type binary_file_name: str
+    :rtype: None
+    """
+    with open(binary_file_name, "wb") as binary_file:
+        for chunk in _binary_chunks(scenario):
+            binary_file.write(chunk)
+
+
+def write_binary_scenarios(scenarios, count, binary_file_name):
+    """Write the scenarios one after the other to binary_file_name, as one
+    binary scenario of count customers.
+
+    Each scenario is written to its place in every column as it comes, so
+    only one of them needs to be in memory at a time. A ValueError is
+    raised if the scenarios do not have count customers in all.
+
+    :type scenarios: Iterable[Scenario]
+    :param count: The total number of customers of scenarios
+    :type count: int
+    :type binary_file_name: str
+    :rtype: None
+
+    >>> import os, tempfile
+    >>> name = os.path.join(tempfile.mkdtemp(), "scenario.scn")
+    >>> parts = [parse_scenario("1\t1\t5\t2\t3\\n"),
+    ...          parse_scenario("2\t22\t5\t2\t9\\n3\t333\t4\t1\t1\\n")]
+    >>> write_binary_scenarios(parts, 3, name)
+    >>> [c.id() for c in map_scenario(name)]
+    ['1', '22', '333']
+    """
+    written = 0
+    ids_length = 0
+    with open(binary_file_name, "wb") as binary_file:
+        for scenario in scenarios:
+            if written + len(scenario) > count:
+                raise ValueError("more than {} customers".format(count))
+            columns = _numeric_columns(scenario)
+            columns[-1] = array("q", [end + ids_length
+                                      for end in scenario._id_ends])
+            for number, (typecode, column) in enumerate(zip(_TYPECODES,
+                                                            columns)):
+                if sys.byteorder != "little":
+                    column = array(typecode, column)
+                    column.byteswap()
+                binary_file.seek(_HEADER.size + 8 * (number * count + written))
+                binary_file.write(column)
+            binary_file.seek(_HEADER.size + 5 * 8 * count + ids_length)
+            binary_file.write(scenario._ids)
+            written += len(scenario)
+            ids_length += len(scenario._ids)
+        if written != count:
+            raise ValueError("{} customers instead of {}".format(written,
+                                                                 count))
+        # the length of the ids is only known once they are all written
+        binary_file.seek(0)
+        binary_file.write(_HEADER.pack(_MAGIC, count, ids_length))
+
+
+def _binary_chunks(scenario):
+    """Yield the binary scenario format of scenario, in order.
+
+    :type scenario: Scenario
+    :rtype: Iterator[bytes | array | memoryview]
+    """
+    yield _HEADER.pack(_MAGIC, len(scenario), len(scenario._ids))
+    for typecode, column in zip(_TYPECODES, _numeric_columns(scenario)):
+        if sys.byteorder != "little":
+            column = array(typecode, column)
+            column.byteswap()
+        yield column
+    yield scenario._ids
+
+
+def convert_scenario(scenario_file_name, binary_file_name):
+    """Convert the text scenario in scenario_file_name to a binary scenario.
+
+    :type scenario_file_name: str
+    :type binary_file_name: str
+    :rtype: None
+    """
+    write_binary_scenario(read_scenario(scenario_file_name), binary_file_name)
+
+
+def map_scenario(binary_file_name):
+    """Return the scenario in binary_file_name, mapped in memory.
+
+    Nothing is parsed or copied: the columns of the returned Scenario read
+    the mapped file directly, so opening a scenario of any size is immediate
+    and processes mapping the same file share its pages.
+
+    :type binary_file_name: str
+    :rtype: Scenario
+    """
+    with open(binary_file_name, "rb") as binary_file:
+        if binary_file.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError("{} is not a binary scenario file".format(
+                binary_file_name))
+        size = binary_file.seek(0, 2)
+        mapped = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, count, ids_length = _HEADER.unpack_from(mapped)
+    if size != _HEADER.size + 5 * 8 * count + ids_length:
+        raise ValueError("{} is truncated or corrupt".format(binary_file_name))
+
+    scenario = _view_scenario(memoryview(mapped), count, ids_length)
+    scenario._file_name = binary_file_name
+    return scenario
+
+
+def _view_scenario(view, count, ids_length):
+    """Return a Scenario reading the binary scenario in view directly.
+
+    :param view: A buffer in the binary scenario format
+    :type view: memoryview
+    :param count: The number of customers in view
+    :type count: int
+    :param ids_length: The length of the joined ids in view
+    :type ids_length: int
+    :rtype: Scenario
+    """
+    scenario = Scenario()
+    columns = []
+    start = _HEADER.size
+    for typecode in _TYPECODES:
+        column = view[start:start + 8 * count].cast(typecode)
+        if sys.byteorder != "little":
+            column = array(typecode, column)
+            column.byteswap()
+        columns.append(column)
+        start += 8 * count
+    (scenario._entry_times, scenario._profits, scenario._prepare_times,
+     scenario._patiences, scenario._id_ends) = columns
+    scenario._ids = view[start:start + ids_length]
+    return scenario
+
+
+class SharedScenario:
+    """A SharedScenario.
+
+    This class holds a scenario in a shared memory block, in the binary
+    scenario format, so that worker processes can simulate it without
+    parsing or copying it. The scenario is copied into the block once;
+    scenario() and attach_scenario then return Scenarios reading the block
+    directly, and such a Scenario is pickled as the name of the block, so
+    it can be handed to a multiprocessing.Pool as it is.
+
+    The block is removed by close, or at the end of a with statement.
+    Scenarios attached to it keep working until they are released. The
+    processes attaching to the block should be started by the process
+    that created it, as multiprocessing workers are, since the block is
+    tracked for removal with that process.
+
+    >>> s = parse_scenario("1\t1\t5\t2\t3\\n2\t2\t5\t2\t9\\n")
+    >>> with SharedScenario(s) as shared:
+    ...     attached = shared.scenario()
+    ...     [customer.id() for customer in attached]
+    ...     attached.release()
+    ['1', '2']
+    """
+
+    # === Private Attributes ===
+    # :type _block: SharedMemory | None
+    #   The shared memory block holding the scenario, or None once closed
+
+    def __init__(self, scenario):
+        """Initialize a shared memory block holding a copy of scenario.
+
+        :type scenario: Scenario
+        """
+        self._block = shared_memory.SharedMemory(
+            create=True,
+            size=_HEADER.size + 5 * 8 * len(scenario) + len(scenario._ids))
+        start = 0
+        for chunk in _binary_chunks(scenario):
+            chunk = memoryview(chunk).cast("B")
+            self._block.buf[start:start + len(chunk)] = chunk
+            start += len(chunk)
+
+    def name(self):
+        """Return the name of the shared memory block.
+
+        :rtype: str
+        """
+        return self._block.name
+
+    def scenario(self):
+        """Return the scenario in the shared memory block.
+
+        :rtype: Scenario
+        """
+        return attach_scenario(self._block.name)
+
+    def close(self):
+        """Remove the shared memory block.
+
+        :rtype: None
+        """
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def __enter__(self):
+        """Return this SharedScenario, for a with statement.
+
+        :rtype: SharedScenario
+        """
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        """Remove the shared memory block at the end of a with statement.
+
+        :rtype: None
+        """
+        self.close()
+
+
+def attach_scenario(shared_name):
+    """Return the scenario in the shared memory block called shared_name.
+
+    Nothing is parsed or copied: the columns of the returned Scenario read
+    the block directly, until it is released. See SharedScenario.
+
+    :type shared_name: str
+    :rtype: Scenario
+    """
+    block = shared_memory.SharedMemory(shared_name)
+    magic, count, ids_length = _HEADER.unpack_from(block.buf)
+    # the block may be rounded up to a whole number of pages
+    if magic != _MAGIC or \
+            block.size < _HEADER.size + 5 * 8 * count + ids_length:
+        block.close()
+        raise ValueError("{} is not a shared scenario".format(shared_name))
+
+    scenario = _view_scenario(block.buf, count, ids_length)
+    scenario._shared_name = shared_name
+    scenario._block = block
+    return scenario
+
+
+# The names of the numeric columns of a Scenario, in binary file order
+_COLUMN_NAMES = ("_entry_times", "_profits", "_prepare_times", "_patiences",
+                 "_id_ends")
+
+
+def _numeric_columns(scenario):
+    """Return the numeric columns of scenario in binary file order.
+
+    :type scenario: Scenario
+    :rtype: List[array | memoryview]
+    """
+    return [scenario._entry_times, scenario._profits, scenario._prepare_times,
+            scenario._patiences, scenario._id_ends]
+
+
+def main(arguments=None):
+    """Convert a text scenario file to a binary scenario file.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert a tab separated scenario to a binary scenario.")
+    parser.add_argument("scenario", help="the text scenario file")
+    parser.add_argument("binary", help="the binary scenario file to write")
+    options = parser.parse_args(arguments)
+    convert_scenario(options.scenario, options.binary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+
+from disk_cache import DiskCache
+from scenario import read_scenario, write_binary_scenario, map_scenario
+
+
+def content_hash(file_name):
+    """Return a hash of the content of file_name, as a hex string.
+
+    :type file_name: str
+    :rtype: str
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_name, "rb") as content_file:
+        for block in iter(lambda: content_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cached_content_hash(cache, file_name):
+    """Return the content_hash of file_name, computed again only if the file
+    changed since it was last stored in cache.
+
+    The hash is stored in cache by the path, size and modification time of
+    the file.
+
+    :type cache: DiskCache
+    :type file_name: str
+    :rtype: str
+    """
+    status = os.stat(file_name)
+    file_key = hashlib.blake2b("{}\0{}\0{}".format(
+        os.path.abspath(file_name), status.st_size,
+        status.st_mtime_ns).encode(), digest_size=20).hexdigest()
+
+    key_file_name = cache.lookup(file_key + ".key")
+    if key_file_name is not None:
+        with open(key_file_name) as key_file:
+            return key_file.read()
+    content_key = content_hash(file_name)
+    cache.store(file_key + ".key", lambda name: _write_text(name, content_key))
+    return content_key
+
+
+class ScenarioCache:
+    """A ScenarioCache.
+
+    This class keeps parsed scenarios on disk, as binary scenario files, so
+    that loading the same scenario file again maps the parsed scenario
+    instead of parsing the text.
+
+    A parsed scenario is stored by the hash of the file content, so copies
+    of a file share it. The hash of each file is itself cached by path,
+    size and modification time, so a repeat load of an unchanged file
+    neither parses nor hashes it. The cache has a size cap, and evicts the
+    least recently used scenarios. The hashes are cached apart, in the
+    hashes subfolder, so they do not count against the cap.
+    """
+
+    # === Private Attributes ===
+    # :type _cache: DiskCache
+    #   The parsed scenarios
+    # :type _hashes: DiskCache
+    #   The content hash of each file seen
+    # :type _hits: int
+    #   The number of loads that found the parsed scenario
+    # :type _misses: int
+    #   The number of loads that parsed the scenario file
+
+    def __init__(self, folder, max_bytes=1 << 30):
+        """Initialize a cache of parsed scenarios in folder.
+
+        :param folder: The folder to keep the parsed scenarios in
+        :type folder: str
+        :param max_bytes: The largest total size of the cache
+        :type max_bytes: int
+        """
+        self._cache = DiskCache(folder, max_bytes)
+        # each hash takes a few dozen bytes
+        self._hashes = DiskCache(os.path.join(folder, "hashes"), 1 << 20)
+        self._hits = 0
+        self._misses = 0
+
+    def load(self, scenario_file_name):
+        """Return the scenario in the text file scenario_file_name.
+
+        The scenario is parsed and added to the cache unless it is already
+        there. Either way, it is returned mapped from the cache.
+
+        :type scenario_file_name: str
+        :rtype: Scenario
+        """
+        content_key = cached_content_hash(self._hashes, scenario_file_name)
+        binary_file_name = self._cache.lookup(content_key + ".scn")
+        if binary_file_name is not None:
+            self._hits += 1
+        else:
+            self._misses += 1
+            scenario = read_scenario(scenario_file_name)
+            binary_file_name = self._cache.store(
+                content_key + ".scn",
+                lambda name: write_binary_scenario(scenario, name))
+        return map_scenario(binary_file_name)
+
+    def stats(self):
+        """Return the hit and miss counts of the loads from this cache, and
+        the eviction count, number and size of the parsed scenarios.
+
+        :rtype: dict
+        """
+        stats = self._cache.stats()
+        stats["hits"] = self._hits
+        stats["misses"] = self._misses
+        return stats
+
+
+def _write_text(file_name, text):
+    """Write text to file_name.
+
+    :type file_name: str
+    :type text: str
+    :rtype: None
+    """
+    with open(file_name, "w") as text_file:
+        text_file.write(text)
@@ -1,5 +1,369 @@
+import io
+import itertools
+import multiprocessing
+from multiprocessing.util import Finalize
+
+from checkpoint import Checkpointer, read_snapshot
 from customer import Customer
-from restaurant import PatApproach, MatApproach, MaxApproach, PacApproach
+from event_trace import TraceWriter
+from instrumentation import Instrumentation
+from optimal import optimal_profit
+from restaurant import DEFAULT_APPROACHES
+from scenario import Scenario, read_scenario, is_binary_scenario, \
+    map_scenario, SharedScenario
+
+def read_customers(scenario_file_name):
+    """Yield the customers of the scenario in scenario_file_name one by one.
+
+    The file is read lazily, one line per customer, and closed once the
+    last customer has been read.
+
+    :param scenario_file_name: Name of the scenario file
+    :type scenario_file_name: str
+    :rtype: Iterator[Customer]
+    """
+    with open(scenario_file_name) as scenario_file:
+        for current_line in scenario_file:
+            yield Customer(current_line.strip())
+
+
+def load_customers(scenario_file_name, streaming=False, columnar=False,
+                   cache=None):
+    """Return the customers of the scenario in scenario_file_name, loaded as
+    Simulator.load_scenario describes.
+
+    :type scenario_file_name: str
+    :type streaming: bool
+    :type columnar: bool
+    :type cache: ScenarioCache | None
+    :rtype: List[Customer] | Scenario | Iterator[Customer]
+    """
+    if is_binary_scenario(scenario_file_name):
+        return map_scenario(scenario_file_name)
+    elif cache is not None and not streaming:
+        return cache.load(scenario_file_name)
+    elif streaming:
+        return read_customers(scenario_file_name)
+    elif columnar:
+        return read_scenario(scenario_file_name)
+    else:
+        return list(read_customers(scenario_file_name))
+
+
+def extend_scenario(scenario, customers):
+    """Return the customers of scenario followed by customers.
+
+    Lists and Scenarios are extended in place when both are of the same
+    type; otherwise the customers are chained into an iterator.
+
+    :type scenario: List[Customer] | Scenario | Iterator[Customer]
+    :type customers: List[Customer] | Scenario | Iterator[Customer]
+    :rtype: List[Customer] | Scenario | Iterator[Customer]
+
+    >>> extend_scenario([], [1, 2])
+    [1, 2]
+    """
+    if isinstance(scenario, list) and len(scenario) == 0:
+        return customers
+    elif type(scenario) == type(customers) and hasattr(customers, "extend"):
+        scenario.extend(customers)
+        return scenario
+    else:
+        return itertools.chain(scenario, customers)
+
+
+class TurnEngine:
+    """A TurnEngine.
+
+    This class drives a group of restaurant approaches through the turns of
+    a simulation. Customers are fed to it in order of entry turn, and it
+    processes the turns in between on every approach.
+
+    In turn by turn mode every turn is processed. In event driven mode only
+    the turns returned by Restaurant.next_event_turn are processed, which
+    skips the idle turns of sparse scenarios and gives the same results.
+    """
+
+    # === Private Attributes ===
+    # :type _approaches: List[Restaurant]
+    #   The approaches being simulated
+    # :type _event_driven: bool
+    #   Whether to process only the turns where something happens
+    # :type _current_turn: int
+    #   The first turn that has not been processed yet
+    # :type _last_turn: int
+    #   The last turn that must be processed, based on when the customers
+    #   added so far may leave the restaurant
+
+    def __init__(self, approaches, event_driven=False):
+        """Initialize a TurnEngine for approaches.
+
+        :type approaches: List[Restaurant]
+        :type event_driven: bool
+        :rtype: None
+        """
+        self._approaches = approaches
+        self._event_driven = event_driven
+        self._current_turn = 1
+        self._last_turn = 0
+
+    def add_customer(self, next_customer):
+        """Process all turns before next_customer enters, then add it.
+
+        :type next_customer: Customer
+        :rtype: None
+        """
+        # While we did not reach the turn that this customer enters the
+        # restaurant, process turns
+        self.advance(next_customer.entry_turn())
+
+        # Ask all approaches to add this customer
+        # Only add 1 customer on each turn
+        # Despite possibly more customer enter at same time
+        for approach in self._approaches:
+            approach.add_customer(next_customer)
+
+        # Update the last turn that we should simulate based on when
+        # this customer may leave the restaurant
+        next_customer_exit_turn = next_customer.entry_turn() + \
+            next_customer.patience()
+        if next_customer_exit_turn > self._last_turn:
+            self._last_turn = next_customer_exit_turn
+
+    def advance(self, turn):
+        """Process every turn before turn that has not been processed yet.
+
+        :type turn: int
+        :rtype: None
+        """
+        if self._event_driven:
+            for approach in self._approaches:
+                event_turn = approach.next_event_turn(self._current_turn)
+                while event_turn is not None and event_turn < turn:
+                    approach.process_turn(event_turn)
+                    event_turn = approach.next_event_turn(event_turn + 1)
+        else:
+            while self._current_turn < turn:
+                # Ask all approaches to process this turn
+                for approach in self._approaches:
+                    approach.process_turn(self._current_turn)
+
+                self._current_turn += 1
+        self._current_turn = max(self._current_turn, turn)
+
+    def finish(self):
+        """Process the remaining turns.
+
+        Continue simulation until we are sure that no customer may remain in
+        a restaurant waiting.
+
+        :rtype: None
+        """
+        self.advance(self._last_turn + 1)
+
+    def current_turn(self):
+        """Return the first turn that has not been processed yet.
+
+        :rtype: int
+        """
+        return self._current_turn
+
+    def approaches(self):
+        """Return the approaches being simulated.
+
+        :rtype: List[Restaurant]
+        """
+        return self._approaches
+
+
+def run_approaches(approaches, scenario, event_driven=False,
+                   instrumentation=None):
+    """Simulate approaches on all customers of scenario.
+
+    :type approaches: List[Restaurant]
+    :type scenario: Iterable[Customer]
+    :type event_driven: bool
+    :param instrumentation: Where to record statistics of the approaches,
+        or None not to record any
+    :type instrumentation: Instrumentation | None
+    :rtype: None
+    """
+    if instrumentation is not None:
+        approaches = instrumentation.instrument(approaches)
+    engine = TurnEngine(approaches, event_driven)
+    _run_engine(engine, scenario, instrumentation is not None)
+
+
+def _run_engine(engine, customers, instrumented, checkpointer=None):
+    """Add customers to engine, then process the remaining turns.
+
+    :type engine: TurnEngine
+    :type customers: Iterable[Customer]
+    :param instrumented: Whether the approaches of engine are instrumented
+    :type instrumented: bool
+    :param checkpointer: Told about each customer added, if given
+    :type checkpointer: Checkpointer | None
+    :rtype: None
+    """
+    # Process all customers entry
+    if checkpointer is None:
+        for next_customer in customers:
+            engine.add_customer(next_customer)
+    else:
+        for next_customer in customers:
+            engine.add_customer(next_customer)
+            checkpointer.customer_added()
+
+    engine.finish()
+    if instrumented:
+        for approach in engine.approaches():
+            approach.close(engine.current_turn())
+
+
+def plan_capacity(scenario, chef_counts, approach_classes=None,
+                  event_driven=True, purge_expired=False):
+    """Simulate the approaches with each number of chefs on scenario.
+
+    The scenario is loaded once and simulated again for each number of
+    chefs, so it must be a list of customers or a Scenario, not a stream.
+
+    Return a list with, for each number of chefs in chef_counts, the
+    simulated approaches in the order of approach_classes.
+
+    :param scenario: The customers entering the restaurant
+    :type scenario: List[Customer] | Scenario
+    :param chef_counts: The numbers of chefs to simulate
+    :type chef_counts: List[int]
+    :param approach_classes: The approaches to simulate, by default the
+        Pat, Mat, Max and Pac approaches
+    :type approach_classes: List[type] | None
+    :type event_driven: bool
+    :type purge_expired: bool
+    :rtype: List[List[Restaurant]]
+    """
+    if iter(scenario) is scenario:
+        raise ValueError("A streamed scenario cannot be simulated more "
+                         "than once")
+    if approach_classes is None:
+        approach_classes = DEFAULT_APPROACHES
+    results = []
+    for chefs in chef_counts:
+        approaches = [approach_class(purge_expired, chefs)
+                      for approach_class in approach_classes]
+        run_approaches(approaches, scenario, event_driven)
+        results.append(approaches)
+    return results
+
+
+def _customers_from(scenario, position):
+    """Return an iterator over the customers of scenario from position on.
+
+    :type scenario: List[Customer] | Scenario | Iterator[Customer]
+    :param position: The number of customers to skip
+    :type position: int
+    :rtype: Iterator[Customer]
+    """
+    if isinstance(scenario, Scenario):
+        return scenario.customers(position)
+    return itertools.islice(scenario, position, None)
+
+
+def resume_simulation(checkpoint_file_name):
+    """Resume the simulation checkpointed in checkpoint_file_name.
+
+    The simulation continues from its latest snapshot, with its scenario
+    files loaded again, and writes the same report it would have written
+    had it not been stopped. It keeps writing snapshots as it did, and the
+    snapshot file is removed once the report is written.
+
+    Return the Instrumentation of the simulation, or None if it was not
+    instrumented.
+
+    :param checkpoint_file_name: The file the simulation was checkpointed in
+    :type checkpoint_file_name: str
+    :rtype: Instrumentation | None
+    """
+    snapshot = read_snapshot(checkpoint_file_name)
+    simulator = Simulator(snapshot["approaches"])
+    for scenario_file_name, streaming, columnar in snapshot["sources"]:
+        simulator.load_scenario(scenario_file_name, streaming, columnar)
+
+    checkpointer = Checkpointer(checkpoint_file_name, snapshot["interval"],
+                                snapshot)
+    instrumentation = snapshot["instrumentation"]
+    _run_engine(snapshot["engine"],
+                _customers_from(simulator._scenario, snapshot["position"]),
+                instrumentation is not None, checkpointer)
+    simulator._write_report(snapshot["report_file_name"], None)
+    checkpointer.remove()
+    return instrumentation
+
+
+# The scenario simulated by a worker process, set once per worker by
+# share_scenario. Forked workers inherit it without copying or parsing.
+_worker_scenario = None
+
+
+def share_scenario(scenario):
+    """Make scenario the scenario simulated by this worker process.
+
+    This is the initializer of the pools of worker processes simulating
+    one scenario. A columnar scenario is released when the worker exits,
+    so such pools should be closed and joined rather than terminated.
+
+    :type scenario: List[Customer] | Scenario
+    :rtype: None
+    """
+    global _worker_scenario
+    _worker_scenario = scenario
+    if isinstance(scenario, Scenario):
+        Finalize(None, scenario.release, exitpriority=0)
+
+
+def worker_scenario():
+    """Return the scenario simulated by this worker process.
+
+    :rtype: List[Customer] | Scenario
+    """
+    return _worker_scenario
+
+
+def result_rows(approaches):
+    """Return one (approach name, total profit, customers served, customers
+    unserved) row for each of approaches, in order.
+
+    :type approaches: List[Restaurant]
+    :rtype: List[(str, float, int, int)]
+
+    >>> from restaurant import PatApproach
+    >>> result_rows([PatApproach()])
+    [('PatApproach', 0.0, 0, 0)]
+    """
+    return [(type(approach).__name__, approach.total_profit(),
+             approach.number_served(), approach.number_unserved())
+            for approach in approaches]
+
+
+def _simulate_approach(approach, event_driven, instrumented):
+    """Simulate approach alone on the worker scenario.
+
+    Return its report, and its statistics if instrumented.
+
+    :type approach: Restaurant
+    :type event_driven: bool
+    :type instrumented: bool
+    :rtype: (str, ApproachStats | None)
+    """
+    instrumentation = Instrumentation() if instrumented else None
+    run_approaches([approach], _worker_scenario, event_driven,
+                   instrumentation)
+
+    report = io.StringIO()
+    approach.write_report(report)
+    if instrumentation is None:
+        return report.getvalue(), None
+    return report.getvalue(), instrumentation.stats()[0]
+
 
 class Simulator:
     """A Simulator.
@@ -18,96 +382,297 @@ class Simulator:
     """
 
     # === Managed Attributes ===
-    # :type _scenario: List[Customer]
-    #     The simulation scenario, which consists of a list of customers that
-    #     will enter the restaurant.
+    # :type _scenario: List[Customer] | Scenario | Iterator[Customer]
+    #     The simulation scenario, which consists of the customers that
+    #     will enter the restaurant. When streaming this is an iterator
+    #     reading the scenario file lazily, and when columnar it is a
+    #     Scenario.
+    # :type _scenario_sources: List[(str, bool, bool)]
+    #     The file name, streaming and columnar arguments of each scenario
+    #     loaded, so that a checkpointed simulation can load them again
     # :type _approaches: List[Restaurant]
     #     All approaches that will be simulated
 
-    def __init__(self):
+    def __init__(self, approaches=None):
         """Initialize a Simulation.
+
+        :param approaches: The approaches to simulate, in report order.
+            Defaults to the Pat, Mat, Max and Pac approaches.
+        :type approaches: List[Restaurant] | None
         """
 
         # Initialize the scenario to an empty list
         self._scenario = []
+        self._scenario_sources = []
 
         # Initialize different approaches that will be simulated
-        self._approaches = []
-        self._approaches.append(PatApproach())
-        self._approaches.append(MatApproach())
-        self._approaches.append(MaxApproach())
-        self._approaches.append(PacApproach())
+        if approaches is not None:
+            self._approaches = list(approaches)
+        else:
+            self._approaches = [approach_class()
+                                for approach_class in DEFAULT_APPROACHES]
 
-    def load_scenario(self, scenario_file_name):
+    def load_scenario(self, scenario_file_name, streaming=False,
+                      columnar=False, cache=None):
         """Load a scenario from the scenario_file_name and store it in _scenario
 
+        When streaming, customers are read from the file only as the
+        simulation reaches their entry turn, and the simulator keeps no
+        reference to them. Memory then only depends on how many customers
+        the approaches are still holding, but the scenario can only be
+        simulated once.
+
+        When columnar, the scenario is stored as a Scenario, which takes an
+        order of magnitude less memory than a list of customers.
+
+        A binary scenario file, as written by scenario.convert_scenario, is
+        always mapped in memory as a Scenario instead of being read, so it
+        loads immediately whatever its size.
+
+        With a cache, a text scenario file is parsed only if the cache does
+        not hold it yet, and is then mapped from the cache like a binary
+        scenario file.
+
         :param scenario_file_name: Name of the scenario file
         :type scenario_file_name: str
+        :param streaming: Whether to read the file lazily during simulate
+        :type streaming: bool
+        :param columnar: Whether to store the scenario in columns
+        :type columnar: bool
+        :param cache: The cache of parsed scenarios to load through, or None
+        :type cache: ScenarioCache | None
         :rtype: None
         """
-        scenario_file = open(scenario_file_name)
-
-        for current_line in scenario_file:
-            new_customer = Customer(current_line.strip())
-            self._scenario.append(new_customer)
+        self._scenario_sources.append((scenario_file_name, streaming,
+                                       columnar or cache is not None))
+        self._scenario = extend_scenario(
+            self._scenario, load_customers(scenario_file_name, streaming,
+                                           columnar, cache))
 
-        scenario_file.close()
-
-
-    def simulate(self, report_file_name):
+    def simulate(self, report_file_name, event_driven=False, parallel=False,
+                 instrumentation=None, checkpoint_file_name=None,
+                 checkpoint_interval=600.0, best_profit=False,
+                 trace_file_name=None, result_cache=None):
         """Run the simulation and write resutls in report_file_name.
 
         This function runs the actual simulation by running a turn by turn
         simulation and writes the result in report_file_name.
 
+        In parallel, each approach is simulated in its own worker process.
+        The approaches share no state, so the report is the same, but the
+        approaches of this simulator are left as they were. A streamed
+        scenario cannot be simulated in parallel.
+
+        When checkpointing, a snapshot of the simulation is written to
+        checkpoint_file_name every checkpoint_interval seconds, and removed
+        once the report is written. If the process is stopped, the
+        simulation can be continued from the snapshot with
+        resume_simulation. A parallel simulation cannot be checkpointed.
+
+        With best_profit, the best profit a single chef could make on the
+        scenario is computed by optimal.optimal_profit and reported after
+        the results of each approach. A streamed scenario is read once more
+        for it.
+
+        When tracing, the arrival of each customer and the start, end and
+        preemption of each order are recorded for every approach in the
+        binary trace file trace_file_name, which event_trace.read_trace
+        reads back. A traced simulation cannot be run in parallel or
+        checkpointed.
+
+        With a result_cache, a report already stored for the same scenario,
+        approaches and options is copied to report_file_name without
+        simulating, and the approaches of this simulator are left as they
+        were. Otherwise the simulation is run and its report stored. A
+        cached simulation cannot be instrumented, checkpointed or traced,
+        as these record more than the report.
+
         :param report_file_name: Name of the report file
         :type report_file_name: str
+        :param event_driven: Whether to skip the turns in which no approach
+            has anything to do. The report is the same either way.
+        :type event_driven: bool
+        :param parallel: Whether to simulate each approach in its own process
+        :type parallel: bool
+        :param instrumentation: Where to record statistics of each approach,
+            or None not to record any
+        :type instrumentation: Instrumentation | None
+        :param checkpoint_file_name: Name of the file to write snapshots
+            to, or None not to write any
+        :type checkpoint_file_name: str | None
+        :param checkpoint_interval: The least number of seconds between two
+            snapshots
+        :type checkpoint_interval: float
+        :param best_profit: Whether to report the best possible profit
+        :type best_profit: bool
+        :param trace_file_name: Name of the file to write the trace of the
+            events to, or None not to trace them
+        :type trace_file_name: str | None
+        :param result_cache: The cache of reports to look the report up in
+            and store it to, or None
+        :type result_cache: ResultCache | None
         :rtype: None
         """
+        if trace_file_name is not None and \
+                (parallel or checkpoint_file_name is not None):
+            raise ValueError("A traced simulation cannot be run in parallel "
+                             "or checkpointed")
+        if result_cache is not None:
+            if instrumentation is not None or \
+                    checkpoint_file_name is not None or \
+                    trace_file_name is not None:
+                raise ValueError("A cached simulation cannot be instrumented, "
+                                 "checkpointed or traced")
+            key = result_cache.key(
+                [source[0] for source in self._scenario_sources],
+                self._approaches, best_profit)
+            if result_cache.fetch(key, report_file_name):
+                return
 
-        current_turn = 1
-        last_turn = 0
+        if best_profit:
+            profit = optimal_profit(self._scenario_again())
+            for approach in self._approaches:
+                approach.set_best_profit(profit)
 
-        # Process all customers entry
-        for next_customer in self._scenario:
-            # While we did not reach the turn that this customer enters the
-            # restaurant, process turns one by one
-            while current_turn < next_customer.entry_turn():
-                # Ask all approaches to process this turn
+        checkpointer = None
+        if parallel:
+            if checkpoint_file_name is not None:
+                raise ValueError("A parallel simulation cannot be "
+                                 "checkpointed")
+            reports = self._simulate_in_parallel(event_driven, instrumentation)
+        elif checkpoint_file_name is not None:
+            reports = None
+            checkpointer = self._simulate_with_checkpoints(
+                report_file_name, event_driven, instrumentation,
+                checkpoint_file_name, checkpoint_interval)
+        elif trace_file_name is not None:
+            reports = None
+            with TraceWriter(trace_file_name) as writer:
                 for approach in self._approaches:
-                    approach.process_turn(current_turn)
+                    writer.trace(approach)
+                run_approaches(self._approaches,
+                               writer.arrivals(self._scenario), event_driven,
+                               instrumentation)
+        else:
+            reports = None
+            run_approaches(self._approaches, self._scenario, event_driven,
+                           instrumentation)
 
-                current_turn += 1
+        self._write_report(report_file_name, reports)
+        if checkpointer is not None:
+            checkpointer.remove()
+        if result_cache is not None:
+            result_cache.store(key, report_file_name)
 
-            # Ask all approaches to add this customer
-            # Only add 1 customer on each turn
-            # Despite possibly more customer enter at same time
-            for approach in self._approaches:
-                approach.add_customer(next_customer)
-
-            # Update the last turn that we should simulate based on when
-            # this customer may leave the restaurant
-            next_customer_exit_turn = next_customer.entry_turn() + next_customer.patience()
-            if (next_customer_exit_turn > last_turn):
-               last_turn = next_customer_exit_turn
-
-        # Continue simulation until we are sure that no customer may remains
-        # in a restaurant waiting
-        while current_turn <= last_turn:
-            # Ask all approaches to process this turn
-            for approach in self._approaches:
-                approach.process_turn(current_turn)
+    def _scenario_again(self):
+        """Return the customers of _scenario for a pass of their own.
+
+        A streamed scenario is read again from its files.
 
-            current_turn += 1
+        :rtype: Iterable[Customer]
+        """
+        if iter(self._scenario) is not self._scenario:
+            return self._scenario
+        simulator = Simulator([])
+        for scenario_file_name, streaming, columnar in self._scenario_sources:
+            simulator.load_scenario(scenario_file_name, streaming, columnar)
+        return simulator._scenario
+
+    def _simulate_with_checkpoints(self, report_file_name, event_driven,
+                                   instrumentation, checkpoint_file_name,
+                                   checkpoint_interval):
+        """Simulate the approaches, writing snapshots along the way.
+
+        Return the Checkpointer that wrote them.
 
+        :type report_file_name: str
+        :type event_driven: bool
+        :type instrumentation: Instrumentation | None
+        :type checkpoint_file_name: str
+        :type checkpoint_interval: float
+        :rtype: Checkpointer
+        """
+        approaches = self._approaches
+        if instrumentation is not None:
+            approaches = instrumentation.instrument(approaches)
+        engine = TurnEngine(approaches, event_driven)
+        snapshot = {"sources": list(self._scenario_sources),
+                    "position": 0,
+                    "approaches": self._approaches,
+                    "engine": engine,
+                    "instrumentation": instrumentation,
+                    "report_file_name": report_file_name,
+                    "interval": checkpoint_interval}
+        checkpointer = Checkpointer(checkpoint_file_name, checkpoint_interval,
+                                    snapshot)
+        checkpointer.write()
+        _run_engine(engine, self._scenario, instrumentation is not None,
+                    checkpointer)
+        return checkpointer
+
+    def _write_report(self, report_file_name, reports):
+        """Write the report of all approaches in report_file_name.
+
+        :type report_file_name: str
+        :param reports: The report of each approach, or None to have the
+            approaches write them
+        :type reports: List[str] | None
+        :rtype: None
+        """
         # Now write report of all approaches in report_file_name
         report_file = open(report_file_name, "w")
 
-        for approach in self._approaches:
-            approach.write_report(report_file)
+        if reports is not None:
+            report_file.write("".join(reports))
+        else:
+            for approach in self._approaches:
+                approach.write_report(report_file)
 
         report_file.close()
 
+    def _simulate_in_parallel(self, event_driven, instrumentation):
+        """Simulate each approach in a worker process and return the reports.
+
+        The scenario is handed to each worker once, when it starts. A
+        columnar scenario is put in shared memory, unless it is mapped from
+        a binary scenario file already, so that the workers share it instead
+        of each holding a copy. Otherwise it is only shared where processes
+        are forked. The reports are returned in the order of _approaches.
+
+        :type event_driven: bool
+        :type instrumentation: Instrumentation | None
+        :rtype: List[str]
+        """
+        if iter(self._scenario) is self._scenario:
+            raise ValueError("A streamed scenario cannot be simulated in "
+                             "parallel")
+        if len(self._approaches) == 0:
+            return []
+
+        processes = min(len(self._approaches), multiprocessing.cpu_count())
+        scenario = self._scenario
+        shared = None
+        if isinstance(scenario, Scenario) and scenario._file_name is None:
+            shared = SharedScenario(scenario)
+            scenario = shared.scenario()
+        try:
+            with multiprocessing.Pool(processes, share_scenario,
+                                      (scenario,)) as pool:
+                results = pool.starmap(_simulate_approach,
+                                       [(approach, event_driven,
+                                         instrumentation is not None)
+                                        for approach in self._approaches])
+                pool.close()
+                pool.join()
+        finally:
+            if shared is not None:
+                scenario.release()
+                shared.close()
+        if instrumentation is not None:
+            for report, stats in results:
+                instrumentation.add_stats(stats)
+        return [report for report, stats in results]
+
 
 if __name__ == "__main__":
     # A sample example of how to create and use simulator class
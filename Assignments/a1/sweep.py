@@ -0,0 +1,205 @@
+import argparse
+import itertools
+import multiprocessing
+import random
+
+from restaurant import DEFAULT_APPROACHES
+from scenario import read_scenario, is_binary_scenario, map_scenario, \
+    SharedScenario
+from simulator import run_approaches, share_scenario, worker_scenario, \
+    result_rows
+
+# The parameters of a variant, in table order, with their default values
+PARAMETERS = (("patience_scale", 1.0), ("prepare_scale", 1.0),
+              ("prepare_jitter", 0), ("profit_scale", 1.0))
+
+
+def variant_grid(patience_scales=(1.0,), prepare_scales=(1.0,),
+                 prepare_jitters=(0,), profit_scales=(1.0,)):
+    """Return every combination of the given parameter values.
+
+    Each variant is a dictionary giving a value to every parameter in
+    PARAMETERS.
+
+    :type patience_scales: List[float]
+    :type prepare_scales: List[float]
+    :type prepare_jitters: List[int]
+    :type profit_scales: List[float]
+    :rtype: List[dict]
+
+    >>> len(variant_grid([0.5, 1, 2], profit_scales=[1, 2]))
+    6
+    """
+    names = [name for name, default in PARAMETERS]
+    return [dict(zip(names, values))
+            for values in itertools.product(patience_scales, prepare_scales,
+                                            prepare_jitters, profit_scales)]
+
+
+def transform_scenario(scenario, variant, seed=0):
+    """Return scenario with the parameters of variant applied.
+
+    Patiences, prepare times and profits are scaled by the scales of
+    variant. Each prepare time is then perturbed by a random whole number of
+    turns between -prepare_jitter and prepare_jitter. The same seed always
+    gives the same perturbations.
+
+    :type scenario: Scenario
+    :type variant: dict
+    :type seed: int
+    :rtype: Scenario
+    """
+    jitter = variant.get("prepare_jitter", 0)
+    offsets = None
+    if jitter != 0:
+        rng = random.Random(seed)
+        offsets = [rng.randint(-jitter, jitter) for row in range(len(scenario))]
+    return scenario.transformed(variant.get("profit_scale", 1.0),
+                                variant.get("prepare_scale", 1.0), offsets,
+                                variant.get("patience_scale", 1.0))
+
+
+def load_scenario(scenario_file_name):
+    """Return the scenario in scenario_file_name, parsed or mapped once.
+
+    :type scenario_file_name: str
+    :rtype: Scenario
+    """
+    if is_binary_scenario(scenario_file_name):
+        return map_scenario(scenario_file_name)
+    return read_scenario(scenario_file_name)
+
+
+def simulate_variant(variant, seed=0, event_driven=True, purge_expired=False,
+                     chefs=1):
+    """Simulate every approach on one variant of the worker scenario.
+
+    Return one (approach name, total profit, customers served, customers
+    unserved) row for each approach, in table order.
+
+    :type variant: dict
+    :type seed: int
+    :type event_driven: bool
+    :type purge_expired: bool
+    :type chefs: int
+    :rtype: List[(str, float, int, int)]
+    """
+    approaches = [approach_class(purge_expired, chefs)
+                  for approach_class in DEFAULT_APPROACHES]
+    run_approaches(approaches, transform_scenario(worker_scenario(), variant,
+                                                  seed),
+                   event_driven)
+    return result_rows(approaches)
+
+
+def run_sweep(scenario_file_name, variants, processes=None, seed=0,
+              event_driven=True, purge_expired=False, chefs=1):
+    """Simulate every approach on every variant of one scenario.
+
+    The scenario is parsed once and handed to each worker process when it
+    starts; each worker then builds the variants it simulates from it. A
+    text scenario is put in shared memory, and a binary scenario file is
+    mapped, so that the workers share it rather than each holding a copy.
+
+    Return one row per variant and approach, in the order of variants and
+    then DEFAULT_APPROACHES: the value of each parameter in PARAMETERS
+    followed by the approach name, total profit, customers served and
+    customers unserved.
+
+    :param scenario_file_name: The text or binary scenario file to sweep
+    :type scenario_file_name: str
+    :param variants: The variants to simulate, as given by variant_grid
+    :type variants: List[dict]
+    :param processes: The number of worker processes, by default one per CPU
+    :type processes: int | None
+    :param seed: The seed of the prepare time perturbations
+    :type seed: int
+    :type event_driven: bool
+    :type purge_expired: bool
+    :type chefs: int
+    :rtype: List[tuple]
+    """
+    scenario = load_scenario(scenario_file_name)
+    shared = None
+    if not is_binary_scenario(scenario_file_name):
+        shared = SharedScenario(scenario)
+        scenario = shared.scenario()
+    try:
+        with multiprocessing.Pool(processes, share_scenario,
+                                  (scenario,)) as pool:
+            results = pool.starmap(simulate_variant,
+                                   [(variant, seed, event_driven,
+                                     purge_expired, chefs)
+                                    for variant in variants],
+                                   chunksize=1)
+            pool.close()
+            pool.join()
+    finally:
+        if shared is not None:
+            scenario.release()
+            shared.close()
+
+    table = []
+    for variant, rows in zip(variants, results):
+        values = tuple(variant.get(name, default)
+                       for name, default in PARAMETERS)
+        for row in rows:
+            table.append(values + row)
+    return table
+
+
+def write_table(table, table_file_name):
+    """Write the rows of run_sweep to table_file_name as tab separated values.
+
+    :type table: List[tuple]
+    :type table_file_name: str
+    :rtype: None
+    """
+    with open(table_file_name, "w") as table_file:
+        table_file.write("\t".join([name for name, default in PARAMETERS] +
+                                   ["approach", "profit", "served",
+                                    "unserved"]) + "\n")
+        for row in table:
+            table_file.write("\t".join(map(str, row)) + "\n")
+
+
+def main(arguments=None):
+    """Run a parameter sweep from the command line.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Simulate every restaurant approach on variants of one "
+                    "scenario.")
+    parser.add_argument("scenario", help="the text or binary scenario file")
+    parser.add_argument("--patience-scale", type=float, nargs="+",
+                        default=[1.0], help="factors to scale patience by")
+    parser.add_argument("--prepare-scale", type=float, nargs="+",
+                        default=[1.0], help="factors to scale prepare time by")
+    parser.add_argument("--prepare-jitter", type=int, nargs="+", default=[0],
+                        help="largest random change of prepare time, in turns")
+    parser.add_argument("--profit-scale", type=float, nargs="+",
+                        default=[1.0], help="factors to scale profit by")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chefs", type=int, default=1)
+    parser.add_argument("-o", "--output", default="sweep.tsv",
+                        help="file to write the comparison table to")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="number of worker processes")
+    parser.add_argument("--turn-by-turn", action="store_true",
+                        help="process every turn instead of only events")
+    parser.add_argument("--purge-expired", action="store_true",
+                        help="drop waiting customers out of patience")
+    options = parser.parse_args(arguments)
+
+    variants = variant_grid(options.patience_scale, options.prepare_scale,
+                            options.prepare_jitter, options.profit_scale)
+    write_table(run_sweep(options.scenario, variants, options.processes,
+                          options.seed, not options.turn_by_turn,
+                          options.purge_expired, options.chefs),
+                options.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+import argparse
+import math
+import random
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from scenario import Scenario, write_binary_scenarios
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The columns drawn at random, each from a random stream of its own
+_ARRIVALS, _PROFITS, _PREPARE_TIMES, _PATIENCES = range(4)
+
+
+def draw(rng, distribution):
+    """Return a random value from distribution.
+
+    A distribution is a tuple naming its kind followed by its parameters:
+    ("constant", value), ("uniform", low, high), ("integers", low, high)
+    with both ends included, or ("exponential", mean).
+
+    :type rng: random.Random
+    :type distribution: tuple
+    :rtype: float
+
+    >>> draw(random.Random(0), ("constant", 4))
+    4
+    >>> 2 <= draw(random.Random(0), ("integers", 2, 5)) <= 5
+    True
+    """
+    kind = distribution[0]
+    if kind == "constant":
+        return distribution[1]
+    if kind == "uniform":
+        return rng.uniform(distribution[1], distribution[2])
+    if kind == "integers":
+        return rng.randint(distribution[1], distribution[2])
+    if kind == "exponential":
+        return rng.expovariate(1 / distribution[1])
+    raise ValueError("unknown distribution {!r}".format(kind))
+
+
+def rush_profile(day_turns=480, rushes=((240, 30, 4.0),)):
+    """Return the relative arrival rate in each turn of a day with rushes.
+
+    Each rush is a (peak turn, width, peak rate) tuple: around the peak
+    turn, the arrival rate rises as a bell curve of the given width in turns
+    up to peak rate times the rate of the quiet hours. The default is a
+    lunch rush in the middle of the day.
+
+    :param day_turns: The number of turns in a day
+    :type day_turns: int
+    :type rushes: Iterable[(int, float, float)]
+    :rtype: List[float]
+
+    >>> profile = rush_profile(10, [(5, 1, 3.0)])
+    >>> profile[5], round(profile[0], 2)
+    (3.0, 1.0)
+    """
+    profile = [1.0] * day_turns
+    for peak, width, peak_rate in rushes:
+        for turn in range(day_turns):
+            # a rush near the end of a day carries over to the next one
+            distance = abs(turn - peak) % day_turns
+            distance = min(distance, day_turns - distance)
+            profile[turn] += (peak_rate - 1) * math.exp(
+                -(distance / width) ** 2 / 2)
+    return profile
+
+
+def synthesize_chunks(customers, seed=0, arrival_rate=1.0, profile=None,
+                      profit=("uniform", 1, 20),
+                      prepare_time=("integers", 1, 10),
+                      patience=("integers", 1, 20), chunk_customers=1 << 16):
+    """Yield a random scenario of customers, as Scenarios of at most
+    chunk_customers customers each.
+
+    Customers arrive as a Poisson process, starting at turn 1. Without a
+    profile, arrival_rate customers arrive per turn on average. With a
+    profile, such as given by rush_profile, the rate in each turn of a day
+    is arrival_rate times the rate of that turn in the profile, and the
+    profile repeats every day. The ids are the numbers of the customers
+    from 0. Profits, prepare times and patiences are drawn as by draw, and
+    profits are rounded to cents and prepare times and patiences to whole
+    turns of at least 0.
+
+    Each column is drawn in bulk with NumPy when it is installed, and with
+    the random module otherwise. Each column has a random stream of its
+    own, so for either one the same seed gives the same scenario whatever
+    the size of the chunks.
+
+    :param customers: The number of customers
+    :type customers: int
+    :type seed: int
+    :param arrival_rate: The average number of customers per turn, outside
+        of rushes with a profile
+    :type arrival_rate: float
+    :param profile: The relative arrival rate in each turn of a day, or
+        None for a constant rate
+    :type profile: List[float] | None
+    :type profit: tuple
+    :type prepare_time: tuple
+    :type patience: tuple
+    :param chunk_customers: The largest number of customers per chunk
+    :type chunk_customers: int
+    :rtype: Iterator[Scenario]
+
+    >>> [len(chunk) for chunk in synthesize_chunks(5, chunk_customers=2)]
+    [2, 2, 1]
+    """
+    if profile is None:
+        profile = [1.0]
+    if len(profile) == 0 or min(profile) <= 0:
+        raise ValueError("the profile must have positive rates")
+    # the arrivals of a unit rate Poisson process are mapped to turns
+    # through the expected number of arrivals by the start of each turn
+    expected = [0.0] + list(accumulate(arrival_rate * rate
+                                       for rate in profile))
+    if numpy is not None:
+        streams = [numpy.random.default_rng(child) for child in
+                   numpy.random.SeedSequence(seed).spawn(4)]
+        make_chunk = _numpy_chunk
+    else:
+        streams = [random.Random("{}/{}".format(seed, column))
+                   for column in range(4)]
+        make_chunk = _python_chunk
+
+    clock = 0.0
+    for first in range(0, customers, chunk_customers):
+        count = min(chunk_customers, customers - first)
+        scenario, clock = make_chunk(streams, count, clock, expected,
+                                     (profit, prepare_time, patience))
+        ids = [str(number) for number in range(first, first + count)]
+        scenario._ids = bytearray("".join(ids).encode())
+        scenario._id_ends = array("q", accumulate(map(len, ids)))
+        yield scenario
+
+
+def _numpy_chunk(streams, count, clock, expected, distributions):
+    """Return a Scenario of count random customers drawn with NumPy, without
+    ids, and the clock of the unit rate arrivals after them.
+
+    :param streams: The random stream of each column
+    :type streams: List[numpy.random.Generator]
+    :type count: int
+    :param clock: The time of the last unit rate arrival so far
+    :type clock: float
+    :param expected: The expected number of arrivals by the start of each
+        turn of a day, and by its end
+    :type expected: List[float]
+    :param distributions: The profit, prepare time and patience
+        distributions
+    :type distributions: (tuple, tuple, tuple)
+    :rtype: (Scenario, float)
+    """
+    times = streams[_ARRIVALS].standard_exponential(count)
+    # added to the first gap, so that the sums are those of a single chunk
+    times[0] += clock
+    times = numpy.cumsum(times)
+    day_turns = len(expected) - 1
+    days = numpy.floor(times / expected[-1])
+    turns = days * day_turns + numpy.interp(times - days * expected[-1],
+                                            expected, range(day_turns + 1))
+    profit, prepare_time, patience = distributions
+
+    scenario = Scenario()
+    scenario._entry_times = _array("q", 1 + numpy.floor(turns))
+    scenario._profits = _array("d", numpy.round(_numpy_draw(
+        streams[_PROFITS], profit, count), 2))
+    scenario._prepare_times = _array("q", numpy.maximum(0, numpy.rint(
+        _numpy_draw(streams[_PREPARE_TIMES], prepare_time, count))))
+    scenario._patiences = _array("q", numpy.maximum(0, numpy.rint(
+        _numpy_draw(streams[_PATIENCES], patience, count))))
+    return scenario, float(times[-1])
+
+
+def _numpy_draw(stream, distribution, count):
+    """Return count random values from distribution, drawn in bulk as
+    draw draws one.
+
+    :type stream: numpy.random.Generator
+    :type distribution: tuple
+    :type count: int
+    :rtype: numpy.ndarray
+    """
+    kind = distribution[0]
+    if kind == "constant":
+        return numpy.full(count, distribution[1], dtype=float)
+    if kind == "uniform":
+        return stream.uniform(distribution[1], distribution[2], count)
+    if kind == "integers":
+        return stream.integers(distribution[1], distribution[2] + 1,
+                               count).astype(float)
+    if kind == "exponential":
+        return stream.exponential(distribution[1], count)
+    raise ValueError("unknown distribution {!r}".format(kind))
+
+
+def _array(typecode, values):
+    """Return the NumPy array values converted to an array of typecode.
+
+    :type typecode: str
+    :type values: numpy.ndarray
+    :rtype: array
+    """
+    column = array(typecode)
+    column.frombytes(values.astype("i8" if typecode == "q" else "f8")
+                     .tobytes())
+    return column
+
+
+def _python_chunk(streams, count, clock, expected, distributions):
+    """Return a Scenario of count random customers drawn with the random
+    module, without ids, and the clock of the unit rate arrivals after them.
+
+    :param streams: The random stream of each column
+    :type streams: List[random.Random]
+    :type count: int
+    :param clock: The time of the last unit rate arrival so far
+    :type clock: float
+    :param expected: The expected number of arrivals by the start of each
+        turn of a day, and by its end
+    :type expected: List[float]
+    :param distributions: The profit, prepare time and patience
+        distributions
+    :type distributions: (tuple, tuple, tuple)
+    :rtype: (Scenario, float)
+    """
+    arrivals = streams[_ARRIVALS]
+    day_turns = len(expected) - 1
+    scenario = Scenario()
+    for number in range(count):
+        clock += arrivals.expovariate(1.0)
+        day, time = divmod(clock, expected[-1])
+        turn = bisect_right(expected, time) - 1
+        turn = min(turn, day_turns - 1)
+        scenario._entry_times.append(1 + int(
+            day * day_turns + turn +
+            (time - expected[turn]) / (expected[turn + 1] - expected[turn])))
+    profit, prepare_time, patience = distributions
+    scenario._profits = array("d", [
+        round(draw(streams[_PROFITS], profit), 2) for number in range(count)])
+    scenario._prepare_times = array("q", [
+        max(0, round(draw(streams[_PREPARE_TIMES], prepare_time)))
+        for number in range(count)])
+    scenario._patiences = array("q", [
+        max(0, round(draw(streams[_PATIENCES], patience)))
+        for number in range(count)])
+    return scenario, clock
+
+
+def synthesize(customers, seed=0, **options):
+    """Return a random scenario of customers, as described in
+    synthesize_chunks.
+
+    :type customers: int
+    :type seed: int
+    :param options: Passed on to synthesize_chunks
+    :rtype: Scenario
+
+    >>> len(synthesize(5, seed=1))
+    5
+    """
+    scenario = Scenario()
+    for chunk in synthesize_chunks(customers, seed, **options):
+        scenario.extend(chunk)
+    return scenario
+
+
+def write_synthesized(scenario_file_name, customers, seed=0, binary=False,
+                      **options):
+    """Write a random scenario of customers, as described in
+    synthesize_chunks, to scenario_file_name.
+
+    The scenario is written chunk by chunk, in the text scenario format or
+    in the binary scenario format, so only one chunk is in memory at a
+    time.
+
+    :type scenario_file_name: str
+    :type customers: int
+    :type seed: int
+    :param binary: Whether to write the binary scenario format
+    :type binary: bool
+    :param options: Passed on to synthesize_chunks
+    :rtype: None
+    """
+    chunks = synthesize_chunks(customers, seed, **options)
+    if binary:
+        write_binary_scenarios(chunks, customers, scenario_file_name)
+        return
+    with open(scenario_file_name, "w") as scenario_file:
+        for chunk in chunks:
+            ids = chunk._ids.decode()
+            starts = [0] + chunk._id_ends[:-1].tolist()
+            scenario_file.write("".join(map(
+                "{}\t{}\t{}\t{}\t{}\n".format, chunk._entry_times,
+                [ids[start:end] for start, end
+                 in zip(starts, chunk._id_ends)],
+                chunk._profits, chunk._prepare_times, chunk._patiences)))
+
+
+def main(arguments=None):
+    """Write a random scenario from the command line.
+
+    :type arguments: List[str] | None
+    :rtype: None
+    """
+    parser = argparse.ArgumentParser(
+        description="Write a random restaurant scenario.")
+    parser.add_argument("scenario", help="the scenario file to write")
+    parser.add_argument("--customers", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--arrival-rate", type=float, default=1.0,
+                        help="average customers per turn outside of rushes")
+    parser.add_argument("--lunch-rush", type=float, default=None,
+                        metavar="PEAK_RATE",
+                        help="add a daily lunch rush with this relative "
+                             "arrival rate at its peak")
+    parser.add_argument("--binary", action="store_true",
+                        help="write the binary scenario format")
+    options = parser.parse_args(arguments)
+
+    profile = None
+    if options.lunch_rush is not None:
+        profile = rush_profile(rushes=[(240, 30, options.lunch_rush)])
+    write_synthesized(options.scenario, options.customers, options.seed,
+                      options.binary, arrival_rate=options.arrival_rate,
+                      profile=profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -168,5 +168,610 @@ class A1Mark(unittest.TestCase):
             self.check_customer_number(total_num,     5)
 
 
+class SimulatorModes(unittest.TestCase):
+    """Check that the optional simulation modes give the usual reports."""
+
+    def setUp(self):
+        import os
+        import tempfile
+        self.folder = os.path.dirname(os.path.abspath(__file__))
+        self.output = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.output)
+
+    def report(self, scenario, columnar=False, **options):
+        """Return the report text of simulating scenario with options"""
+        import os
+        from simulator import Simulator
+        simulator = Simulator()
+        simulator.load_scenario(os.path.join(self.folder, scenario),
+                                columnar=columnar)
+        report_name = os.path.join(self.output, "report.txt")
+        simulator.simulate(report_name, **options)
+        with open(report_name) as f:
+            return f.read()
+
+    def test_event_driven(self):
+        """event driven simulation skips idle turns with the same results"""
+        for scenario in ("test0.txt", "test1.txt", "test2.txt", "test3.txt",
+                         "scenario1.txt"):
+            self.assertEqual(self.report(scenario),
+                             self.report(scenario, event_driven=True))
+
+    def test_max_pac_ties(self):
+        """Max and Pac keep the earliest of equal customers"""
+        import os
+        scenarios = {
+            # equal customers in the waiting list
+            "1\t1\t9\t3\t8\n1\t2\t7\t2\t8\n2\t3\t7\t3\t8\n5\t4\t7\t2\t5\n":
+                (9.0, 1, 7.0, 1),
+            # a customer arriving in the same turn as an equal order
+            "1\t1\t4\t2\t5\n1\t2\t4\t2\t2\n4\t3\t9\t3\t1\n5\t4\t4\t2\t2\n":
+                (4.0, 1, 4.0, 1)}
+        for text, (max_profit, max_served, pac_profit, pac_served) \
+                in scenarios.items():
+            scenario = os.path.join(self.output, "ties.txt")
+            with open(scenario, "w") as f:
+                f.write(text)
+            lines = self.report(scenario).split("\n")
+            self.assertEqual(lines[7:9], ["Total profit: ${} ".format(
+                max_profit), "Customer served: {}".format(max_served)])
+            self.assertEqual(lines[10:12], ["Total profit: ${} ".format(
+                pac_profit), "Customer served: {}".format(pac_served)])
+
+
+    def test_streaming(self):
+        """streaming the scenario file gives the same results"""
+        from simulator import Simulator
+        import os
+        simulator = Simulator()
+        simulator.load_scenario(os.path.join(self.folder, "test2.txt"),
+                                streaming=True)
+        report_name = os.path.join(self.output, "streamed.txt")
+        simulator.simulate(report_name, event_driven=True)
+        with open(report_name) as f:
+            self.assertEqual(f.read(), self.report("test2.txt"))
+
+
+    def test_parallel(self):
+        """simulating the approaches in worker processes gives the same results"""
+        self.assertEqual(self.report("test2.txt"),
+                         self.report("test2.txt", parallel=True))
+
+
+    def test_columnar(self):
+        """a scenario stored in columns gives the same customers and results"""
+        import os
+        from scenario import read_scenario
+        from simulator import read_customers
+        name = os.path.join(self.folder, "test2.txt")
+        self.assertEqual(list(read_scenario(name)),
+                         list(read_customers(name)))
+        self.assertEqual(self.report("test2.txt"),
+                         self.report("test2.txt", columnar=True))
+
+
+    def test_binary_scenario(self):
+        """a converted binary scenario is mapped with the same customers"""
+        import os
+        from scenario import convert_scenario, map_scenario, read_scenario
+        from simulator import Simulator
+        name = os.path.join(self.folder, "test2.txt")
+        binary_name = os.path.join(self.output, "test2.scn")
+        convert_scenario(name, binary_name)
+        self.assertEqual(list(map_scenario(binary_name)),
+                         list(read_scenario(name)))
+        simulator = Simulator()
+        simulator.load_scenario(binary_name)
+        report_name = os.path.join(self.output, "binary.txt")
+        simulator.simulate(report_name)
+        with open(report_name) as f:
+            self.assertEqual(f.read(), self.report("test2.txt"))
+
+    def test_shared_scenario(self):
+        """a scenario in shared memory is pickled by name, not copied"""
+        import os
+        import pickle
+        from scenario import SharedScenario, read_scenario
+        scenario = read_scenario(os.path.join(self.folder, "test2.txt"))
+        with SharedScenario(scenario) as shared:
+            attached = pickle.loads(pickle.dumps(shared.scenario()))
+            self.assertLess(len(pickle.dumps(attached)), 200)
+            self.assertEqual(list(attached), list(scenario))
+            customers = attached.customers()
+            next(customers)
+            attached.release()
+            self.assertEqual(len(attached), 0)
+        self.assertEqual(self.report("test2.txt", columnar=True,
+                                     parallel=True),
+                         self.report("test2.txt"))
+
+
+    def test_scenario_cache(self):
+        """a cached scenario is parsed once and gives the usual report"""
+        import os
+        from scenario_cache import ScenarioCache
+        from simulator import Simulator
+        cache = ScenarioCache(os.path.join(self.output, "cache"))
+        report_name = os.path.join(self.output, "cached.txt")
+        for run in range(2):
+            simulator = Simulator()
+            simulator.load_scenario(os.path.join(self.folder, "test2.txt"),
+                                    cache=cache)
+            simulator.simulate(report_name)
+            with open(report_name) as f:
+                self.assertEqual(f.read(), self.report("test2.txt"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        # only the parsed scenario counts against the cap
+        self.assertEqual(stats["entries"], 1)
+
+    def test_bulk_parser_rejects_malformed_lines(self):
+        """the bulk parser names the first malformed line"""
+        from scenario import parse_scenario
+        with self.assertRaisesRegex(ValueError, "^line 3: expected 5"):
+            parse_scenario("1\t1\t2.5\t3\t4\n\n2\t2\t2.5\t3\n")
+        with self.assertRaisesRegex(ValueError, "^line 2: .*'x'"):
+            parse_scenario("1\t1\t2.5\t3\t4\n2\t2\t2.5\tx\t4\n")
+        with self.assertRaisesRegex(ValueError, "^line 2: .* out of range"):
+            parse_scenario("1\t1\t2.5\t3\t4\n"
+                           "2\t2\t2.5\t3\t99999999999999999999\n")
+        # both backends accept the same integers
+        import scenario
+        backends = [None]
+        if scenario.numpy is not None:
+            backends.append(scenario.numpy)
+        try:
+            for scenario.numpy in backends:
+                for field in ("-", "1_0", "3.0", "99999999999999999999"):
+                    with self.assertRaisesRegex(ValueError, "^line 2: "):
+                        parse_scenario("1\t1\t2.5\t3\t4\n"
+                                       "2\t2\t2.5\t{}\t4\n".format(field))
+                self.assertEqual(parse_scenario(
+                    "1\t1\t2.5\t+3\t-4\n").patience(0), -4)
+        finally:
+            scenario.numpy = backends[-1]
+        # the largest integer is still read as itself
+        self.assertEqual(parse_scenario(
+            "1\t1\t2.5\t3\t9223372036854775807\n").patience(0),
+            9223372036854775807)
+
+
+    def test_purge_expired(self):
+        """expired customers are dropped from the waiting list"""
+        from customer import Customer
+        from restaurant import PatApproach
+        from simulator import TurnEngine
+        approach = PatApproach(purge_expired=True)
+        engine = TurnEngine([approach])
+        for definition in ("1\t1\t5\t3\t5", "2\t2\t1\t3\t1",
+                           "3\t3\t2\t6\t9", "4\t4\t3\t1\t3",
+                           "5\t5\t1\t9\t9"):
+            engine.add_customer(Customer(definition))
+        engine.finish()
+        # the second customer ran out of patience while the first was
+        # prepared, so the third is served once the fifth enters
+        self.assertEqual(approach.number_abandoned(), 1)
+        self.assertEqual(approach.number_served(), 2)
+        self.assertEqual(approach.total_profit(), 7)
+        self.assertEqual(approach.number_unserved(), 3)
+
+    def test_policy(self):
+        """a new approach only needs a priority and a description"""
+        import io
+        from customer import Customer
+        from restaurant import Restaurant, DeadlineApproach
+        from simulator import TurnEngine
+
+        class LowestProfitApproach(Restaurant):
+            description = "the lowest profit first"
+
+            def priority(self, customer):
+                return customer._profit
+
+        approaches = [DeadlineApproach(), LowestProfitApproach()]
+        engine = TurnEngine(approaches)
+        for definition in ("1\t1\t5\t2\t9", "1\t2\t3\t2\t4",
+                           "1\t3\t1\t2\t9"):
+            engine.add_customer(Customer(definition))
+        engine.finish()
+        # the second customer has the earliest deadline, the third the
+        # lowest profit
+        self.assertEqual(approaches[0].total_profit(), 3)
+        self.assertEqual(approaches[1].total_profit(), 1)
+        report = io.StringIO()
+        approaches[1].write_report(report)
+        self.assertEqual(report.getvalue().splitlines()[0],
+                         "Results for the serving approach using the "
+                         "lowest profit first:")
+
+    def test_chefs(self):
+        """more chefs serve customers that would otherwise wait too long"""
+        from customer import Customer
+        from restaurant import PatApproach
+        from simulator import plan_capacity
+        scenario = [Customer("1\t1\t5\t3\t5"), Customer("2\t2\t4\t2\t5")]
+        one, two = plan_capacity(scenario, [1, 2], [PatApproach])
+        self.assertEqual(one[0].number_served(), 1)
+        self.assertEqual(two[0].number_served(), 2)
+        self.assertEqual(two[0].total_profit(), 9)
+        self.assertTrue(two[0].is_idle())
+        with self.assertRaises(ValueError):
+            PatApproach(chefs=0)
+
+    def test_same_turn_burst(self):
+        """replaced orders are forgotten, so a burst stays cheap"""
+        from customer import Customer
+        from restaurant import MatApproach, MaxApproach, PacApproach
+        for approach_class in (MatApproach, MaxApproach, PacApproach):
+            for chefs in (1, 3):
+                approach = approach_class(chefs=chefs)
+                # each newcomer comes before the orders started so far
+                for number in range(200):
+                    approach.add_customer(Customer("1\t{}\t{}\t{}\t500"
+                                                   .format(number, number + 1,
+                                                           300 - number)))
+                    self.assertLessEqual(len(approach._started_this_turn),
+                                         chefs)
+                approach.process_turn(1)
+                self.assertEqual(approach._number_cooking, chefs)
+
+    def test_resume(self):
+        """a simulation stopped halfway resumes to the same report"""
+        import os
+        from simulator import Simulator, resume_simulation
+
+        def stopped(customers, count):
+            for number, customer in enumerate(customers):
+                if number == count:
+                    raise KeyboardInterrupt
+                yield customer
+
+        simulator = Simulator()
+        simulator.load_scenario(os.path.join(self.folder, "test2.txt"),
+                                columnar=True)
+        simulator._scenario = stopped(simulator._scenario, 3)
+        checkpoint_name = os.path.join(self.output, "checkpoint")
+        report_name = os.path.join(self.output, "resumed.txt")
+        with self.assertRaises(KeyboardInterrupt):
+            simulator.simulate(report_name,
+                               checkpoint_file_name=checkpoint_name,
+                               checkpoint_interval=0)
+        resume_simulation(checkpoint_name)
+        self.assertFalse(os.path.exists(checkpoint_name))
+        with open(report_name) as f:
+            self.assertEqual(f.read(), self.report("test2.txt"))
+
+    def test_generated_scenario(self):
+        """the benchmark generator is repeatable and sorted by entry turn"""
+        import os
+        from benchmark import generate_scenario
+        from scenario import read_scenario
+        first = os.path.join(self.output, "first.txt")
+        second = os.path.join(self.output, "second.txt")
+        generate_scenario(first, 500, seed=3, arrival_rate=0.5)
+        generate_scenario(second, 500, seed=3, arrival_rate=0.5)
+        with open(first) as f, open(second) as g:
+            self.assertEqual(f.read(), g.read())
+        turns = [customer.entry_turn() for customer in read_scenario(first)]
+        self.assertEqual(len(turns), 500)
+        self.assertEqual(turns, sorted(turns))
+
+
+    def test_instrumentation(self):
+        """instrumented simulations record the same counters in both modes"""
+        import os
+        from instrumentation import Instrumentation
+        counters = []
+        for event_driven in (False, True):
+            instrumentation = Instrumentation()
+            self.assertEqual(self.report("test2.txt", event_driven=event_driven,
+                                         instrumentation=instrumentation),
+                             self.report("test2.txt"))
+            counters.append([(stats.name, stats.add_calls, stats.abandoned,
+                              stats.idle_turns)
+                             for stats in instrumentation.stats()])
+        self.assertEqual(counters[0], counters[1])
+        self.assertEqual(counters[0][0][1], 6)
+        instrumentation.write_csv(os.path.join(self.output, "stats.csv"))
+        with open(os.path.join(self.output, "stats.csv")) as f:
+            self.assertEqual(len(f.read().splitlines()), 5)
+
+
+    def test_batch(self):
+        """the batch runner writes each report and a summary table"""
+        import os
+        from batch import find_scenarios, run_batch
+        broken = os.path.join(self.output, "broken.txt")
+        with open(broken, "w") as f:
+            f.write("1\tA\tnot a profit\t2\t9\n")
+        short = os.path.join(self.output, "short.txt")
+        with open(short, "w") as f:
+            f.write("1\t1\t5\t2\t9\n2\t2\t5\n")
+        blank = os.path.join(self.output, "blank.txt")
+        with open(blank, "w") as f:
+            f.write("1\t1\t5\t2\t9\n\n")
+        scenarios = [os.path.join(self.folder, name)
+                     for name in ("test1.txt", "test2.txt")] + \
+            [broken, short, blank]
+        summary_name = os.path.join(self.output, "summary.tsv")
+        run_batch(scenarios, self.output, summary_name, processes=2)
+        with open(os.path.join(self.output, "test2_report.txt")) as f:
+            self.assertEqual(f.read(), self.report("test2.txt"))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.output, "broken_report.txt")))
+        with open(summary_name) as f:
+            rows = [line.split("\t") for line in f.read().splitlines()]
+        # a blank line is skipped, and a short line fails its scenario only
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(rows[1][1:], ["PatApproach", "3.9", "1", "0", ""])
+        self.assertEqual(rows[9][:5], [broken, "", "", "", ""])
+        self.assertIn("ValueError", rows[9][5])
+        self.assertEqual(rows[10][:5], [short, "", "", "", ""])
+        self.assertIn("line 2", rows[10][5])
+        self.assertEqual(rows[11][:2], [blank, "PatApproach"])
+        # the reports written beside the scenarios are not scenarios
+        found = find_scenarios([self.folder])
+        self.assertIn(os.path.join(self.folder, "test2.txt"), found)
+        self.assertNotIn(os.path.join(self.folder, "test2_output.txt"),
+                         found)
+        self.assertNotIn(os.path.join(self.folder, "report1.txt"), found)
+
+    def test_sweep(self):
+        """a sweep simulates every variant of one parsed scenario"""
+        import os
+        from batch import simulate_scenario
+        from sweep import run_sweep, variant_grid
+        scenario = os.path.join(self.folder, "test2.txt")
+        table = run_sweep(scenario, variant_grid(prepare_jitters=[0, 1],
+                                                 profit_scales=[1, 2]),
+                          processes=2)
+        self.assertEqual(len(table), 16)
+        # the unchanged variant gives the usual results
+        rows, error = simulate_scenario(scenario, self.output)
+        self.assertEqual([row[4:] for row in table[:4]], rows)
+        self.assertEqual([row[5] for row in table[4:8]],
+                         [2 * row[1] for row in rows])
+
+    def test_best_profit(self):
+        """the best possible profit is reported under every approach"""
+        from customer import Customer
+        from optimal import optimal_schedule
+        # serving the second customer first leaves time for the first
+        profit, served = optimal_schedule([Customer("1\t1\t5\t4\t9"),
+                                           Customer("2\t2\t3\t1\t9"),
+                                           Customer("4\t3\t3\t1\t9")])
+        self.assertEqual(profit, 8)
+        self.assertEqual([customer.id() for customer in served], ["2", "1"])
+
+        lines = self.report("test2.txt", best_profit=True).splitlines()
+        self.assertEqual(len(lines), 16)
+        best = float(lines[3].split("$")[1])
+        for line in lines[1::4]:
+            self.assertLessEqual(float(line.split("$")[1]), best)
+        self.assertEqual(lines[3::4], [lines[3]] * 4)
+
+    def test_live(self):
+        """a live feed gives running totals and the usual final report"""
+        import asyncio
+        import os
+        from live import LiveSimulator
+
+        with open(os.path.join(self.folder, "test2.txt")) as f:
+            lines = f.readlines()
+        live = LiveSimulator()
+        interim = []
+
+        async def feed():
+            for number, line in enumerate(lines):
+                if number == 3:
+                    interim.append(live.totals())
+                yield line
+                await asyncio.sleep(0)
+
+        report_name = os.path.join(self.output, "live.txt")
+        # the clock is too slow to pass any entry turn during the feed
+        asyncio.run(live.run(feed(), turn_seconds=60,
+                             report_file_name=report_name,
+                             report_seconds=0.001))
+        self.assertEqual(len(interim[0]), 4)
+        with open(report_name) as f:
+            self.assertEqual(f.read(), self.report("test2.txt"))
+
+    def test_live_rejects_malformed_lines(self):
+        """a malformed line is skipped without stopping the live feed"""
+        import asyncio
+        import os
+        from live import LiveSimulator
+        with open(os.path.join(self.folder, "test2.txt")) as f:
+            lines = f.readlines()
+        lines[2:2] = ["garbage\n", "2\t2\t5\n"]
+        live = LiveSimulator()
+
+        async def feed():
+            for line in lines:
+                yield line
+
+        report_name = os.path.join(self.output, "live.txt")
+        asyncio.run(live.run(feed(), report_file_name=report_name))
+        self.assertEqual(live.number_rejected(), 2)
+        with open(report_name) as f:
+            self.assertEqual(f.read(), self.report("test2.txt") +
+                             "Lines rejected: 2\n")
+
+    def test_live_late_arrival(self):
+        """a customer arriving after the clock passed their turn enters now"""
+        from live import LiveSimulator
+        live = LiveSimulator()
+        live.advance(50)
+        customer = live.add_line("1\t1\t5\t5\t10")
+        self.assertEqual(customer.entry_turn(), 50)
+        live.finish()
+        self.assertEqual(live.totals(), [(name, 5.0, 1, 0) for name in (
+            "PatApproach", "MatApproach", "MaxApproach", "PacApproach")])
+
+    def test_trace(self):
+        """a trace accounts for every customer of every approach"""
+        import os
+        from event_trace import customer_table, read_trace
+        trace_name = os.path.join(self.output, "trace.bin")
+        self.assertEqual(self.report("test2.txt", trace_file_name=trace_name),
+                         self.report("test2.txt"))
+        rows = customer_table(read_trace(trace_name))
+        with open(os.path.join(self.folder, "test2.txt")) as f:
+            customers = len(f.readlines())
+        self.assertEqual(len(rows), 4 * customers)
+        report = self.report("test2.txt").splitlines()
+        for number, name in enumerate(("Pat", "Mat", "Max", "Pac")):
+            served = [row for row in rows
+                      if row[0] == name + "Approach" and row[5] == "served"]
+            self.assertEqual("Customer served: {}".format(len(served)),
+                             report[3 * number + 2])
+        with self.assertRaises(ValueError):
+            self.report("test2.txt", parallel=True, trace_file_name=trace_name)
+
+    def test_trace_served_counts(self):
+        """the customer table of a trace agrees with the reports"""
+        import os
+        from benchmark import generate_customers
+        from event_trace import TraceWriter, customer_table, read_trace
+        from restaurant import DEFAULT_APPROACHES
+        from simulator import run_approaches
+        trace_name = os.path.join(self.output, "trace.bin")
+        for seed in range(30):
+            approaches = [approach_class()
+                          for approach_class in DEFAULT_APPROACHES]
+            with TraceWriter(trace_name) as writer:
+                for approach in approaches:
+                    writer.trace(approach)
+                run_approaches(approaches, writer.arrivals(
+                    generate_customers(40, seed, arrival_rate=2.0)), True)
+            rows = customer_table(read_trace(trace_name))
+            for approach in approaches:
+                served = [row for row in rows
+                          if row[0] == type(approach).__name__ and
+                          row[5] == "served"]
+                self.assertEqual(len(served), approach.number_served())
+
+    def test_result_cache(self):
+        """a cached report is simulated once, and is evicted past the caps"""
+        import os
+        from restaurant import PatApproach
+        from result_cache import ResultCache
+        from simulator import Simulator
+        cache = ResultCache(os.path.join(self.output, "results"))
+        for run in range(2):
+            self.assertEqual(self.report("test2.txt", result_cache=cache),
+                             self.report("test2.txt"))
+        simulator = Simulator([PatApproach(True)])
+        simulator.load_scenario(os.path.join(self.folder, "test2.txt"))
+        simulator.simulate(os.path.join(self.output, "purged.txt"),
+                           result_cache=cache)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        with self.assertRaises(ValueError):
+            self.report("test2.txt", result_cache=cache,
+                        trace_file_name=os.path.join(self.output, "t.bin"))
+
+        # the cap counts reports, not the cached hashes of the scenarios
+        small = ResultCache(os.path.join(self.output, "small"), max_entries=2)
+        for scenario in ("test2.txt", "test3.txt"):
+            self.report(scenario, result_cache=small)
+        stats = small.stats()
+        self.assertEqual((stats["entries"], stats["evictions"]), (2, 0))
+        self.report("test1.txt", result_cache=small)
+        stats = small.stats()
+        self.assertEqual((stats["entries"], stats["evictions"]), (2, 1))
+
+    def test_synthesizer(self):
+        """synthesized scenarios do not depend on chunks, and read back"""
+        import os
+        from scenario import map_scenario, read_scenario
+        from synthesizer import rush_profile, synthesize, write_synthesized
+        options = {"arrival_rate": 0.5,
+                   "profile": rush_profile(48, [(24, 3, 5)])}
+        scenario = list(synthesize(3000, 7, **options))
+        self.assertEqual(list(synthesize(3000, 7, chunk_customers=100,
+                                         **options)), scenario)
+        text_name = os.path.join(self.output, "synthesized.txt")
+        binary_name = os.path.join(self.output, "synthesized.scn")
+        write_synthesized(text_name, 3000, 7, chunk_customers=512, **options)
+        write_synthesized(binary_name, 3000, 7, binary=True,
+                          chunk_customers=512, **options)
+        self.assertEqual(list(read_scenario(text_name)), scenario)
+        self.assertEqual(list(map_scenario(binary_name)), scenario)
+        # an eighth of the day around the rush gets over a quarter of them
+        rush = sum(1 for customer in scenario
+                   if 21 <= (customer.entry_turn() - 1) % 48 < 27)
+        self.assertGreater(rush, len(scenario) / 4)
+
+    def test_branches(self):
+        """each branch reports as if simulated on its own customers"""
+        import os
+        from branches import BranchSimulator
+        from restaurant import PatApproach, MatApproach, MaxApproach, \
+            PacApproach
+        with open(os.path.join(self.folder, "test2.txt")) as f:
+            lines = [line for line in f if line.strip() != ""]
+        expected = ""
+        for branch in range(2):
+            part_name = os.path.join(self.output, "branch.txt")
+            with open(part_name, "w") as f:
+                f.writelines(lines[branch::2])
+            expected += "Branch {}:\n".format(branch + 1) + \
+                self.report(part_name)
+        simulator = BranchSimulator(
+            [[PatApproach(), MatApproach(), MaxApproach(), PacApproach()]
+             for branch in range(2)])
+        simulator.load_scenario(os.path.join(self.folder, "test2.txt"),
+                                streaming=True)
+        report_name = os.path.join(self.output, "branches.txt")
+        simulator.simulate(report_name, event_driven=True)
+        with open(report_name) as f:
+            self.assertEqual(f.read(), expected)
+
+        # the default round robin starts over on each simulation
+        simulator = BranchSimulator([[PatApproach()], [PatApproach()]])
+        simulator.load_scenario(os.path.join(self.folder, "test1.txt"),
+                                columnar=True)
+        for run in range(2):
+            simulator.simulate(report_name)
+        second = simulator.branches()[1][0]
+        self.assertEqual((second.number_served(), second.number_unserved()),
+                         (0, 0))
+
+        simulator = BranchSimulator([[PatApproach()]], lambda customer: 1)
+        simulator.load_scenario(os.path.join(self.folder, "test2.txt"))
+        with self.assertRaises(ValueError):
+            simulator.simulate(report_name)
+
+    def test_monte_carlo(self):
+        """the comparison depends on the seeds only, and can stop early"""
+        from montecarlo import run_monte_carlo, simulate_seed
+        results = run_monte_carlo(4, customers=50, seed=3, processes=2,
+                                  min_runs=4)
+        self.assertEqual(results["runs"], 4)
+        self.assertFalse(results["stopped_early"])
+        first = simulate_seed(3, 50, True, {})
+        self.assertEqual(first, simulate_seed(3, 50, False, {}))
+        self.assertEqual(len(results["approaches"]), 4)
+
+        # exponential profits set the approaches well apart
+        results = run_monte_carlo(200, customers=50, processes=2, min_runs=5,
+                                  arrival_rate=2.0,
+                                  profit=("exponential", 10))
+        self.assertTrue(results["stopped_early"])
+        self.assertLess(results["runs"], 200)
+
+    def test_t_quantile_low_degrees(self):
+        """intervals from a handful of runs use the exact t quantiles"""
+        from montecarlo import t_quantile
+        for degrees, expected in ((1, 12.706), (2, 4.303), (3, 3.182),
+                                  (4, 2.776), (5, 2.571), (30, 2.042)):
+            self.assertAlmostEqual(t_quantile(0.975, degrees), expected, 2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,441 @@
+import heapq
+from collections import deque
+
+
+class WaitingList:
+    """A WaitingList.
+
+    This class represents the customers waiting in a restaurant. This is the
+    base class for the different waiting structures; each subclass decides
+    which customer is removed next.
+
+    A waiting list can also track when each customer runs out of patience,
+    so that expired customers can be dropped with expire. Expired customers
+    are dropped lazily: they are skipped when they reach the front, and the
+    structure is rebuilt without them once they are half of it. Each
+    expired customer costs O(log n) amortized.
+
+    This class is abstract; subclasses must implement _put, _take and
+    _keep_only.
+    """
+
+    # === Private Attributes ===
+    # :type _content: list
+    #   The customers currently waiting, in the order of the subclass
+    # :type _deadlines: List[(int, int, Customer)] | None
+    #   When tracking, a binary heap of (turn the patience runs out, tracking
+    #   number, customer) for the customers added. None when not tracking.
+    # :type _tracked: int
+    #   The number of customers tracked so far, used to break ties
+    # :type _copies: Dict[int, int]
+    #   The number of copies in _content of each tracked customer, by id()
+    # :type _expired: Set[int]
+    #   The id() of the expired customers still in _content
+    # :type _dead: int
+    #   The number of copies of expired customers still in _content
+
+    def __init__(self):
+        """Initialize an empty waiting list.
+        """
+        self._content = []
+        self._deadlines = None
+        self._tracked = 0
+        self._copies = {}
+        self._expired = set()
+        self._dead = 0
+
+    def __getstate__(self):
+        """Return the state of this waiting list for pickling.
+
+        The tracked customers are recorded by themselves rather than by
+        id(), which changes when they are unpickled.
+
+        :rtype: dict
+        """
+        state = self.__dict__.copy()
+        stored = {id(customer): customer
+                  for customer in self._stored_customers()}
+        state["_copies"] = [(stored[key], copies)
+                            for key, copies in self._copies.items()]
+        state["_expired"] = [stored[key] for key in self._expired]
+        return state
+
+    def __setstate__(self, state):
+        """Restore the state of a pickled waiting list.
+
+        :type state: dict
+        :rtype: None
+        """
+        self.__dict__.update(state)
+        self._copies = {id(customer): copies
+                        for customer, copies in state["_copies"]}
+        self._expired = {id(customer) for customer in state["_expired"]}
+
+    def track_deadlines(self):
+        """
+        Start tracking when the customers added from now on run out of patience.
+
+        :rtype: None
+        """
+        if self._deadlines is None:
+            self._deadlines = []
+
+    def add(self, customer):
+        """
+        Add customer to this waiting list.
+
+        :type customer: Customer
+        :rtype: None
+        """
+        self._put(customer)
+        if self._deadlines is not None:
+            heapq.heappush(self._deadlines,
+                           (customer._entry_time + customer._patience,
+                            self._tracked, customer))
+            self._tracked += 1
+            key = id(customer)
+            self._copies[key] = self._copies.get(key, 0) + 1
+
+    def remove(self):
+        """
+        Remove and return the next customer to be served.
+
+        Assume this waiting list is not empty.
+
+        :rtype: Customer
+        """
+        customer = self._take()
+        while self._dead > 0 and id(customer) in self._expired:
+            self._forget(customer)
+            self._dead -= 1
+            customer = self._take()
+        if self._deadlines is not None:
+            self._forget(customer)
+        return customer
+
+    def expire(self, current_turn, dropped_customers=None):
+        """
+        Drop the tracked customers whose patience runs out by current_turn.
+
+        Return the number of customers dropped.
+
+        :type current_turn: int
+        :param dropped_customers: A list to append the customers dropped to,
+            or None
+        :type dropped_customers: List[Customer] | None
+        :rtype: int
+
+        >>> from customer import Customer
+        >>> w = QueueWaitingList()
+        >>> w.track_deadlines()
+        >>> w.add(Customer("1\\t1\\t5\\t2\\t3"))
+        >>> w.add(Customer("2\\t2\\t5\\t2\\t9"))
+        >>> w.expire(4)
+        1
+        >>> len(w)
+        1
+        >>> w.remove().id()
+        '2'
+        """
+        if self._deadlines is None:
+            return 0
+        dropped = 0
+        while len(self._deadlines) > 0 and \
+                self._deadlines[0][0] <= current_turn:
+            customer = heapq.heappop(self._deadlines)[2]
+            key = id(customer)
+            # skip customers already served or already expired
+            if key in self._copies and key not in self._expired:
+                self._expired.add(key)
+                self._dead += self._copies[key]
+                dropped += 1
+                if dropped_customers is not None:
+                    dropped_customers.append(customer)
+        if self._dead > len(self._content) // 2:
+            self._keep_only(self._keep)
+        return dropped
+
+    def _keep(self, customer):
+        """
+        Return whether customer is to stay in _content when it is rebuilt,
+        forgetting it if it is not.
+
+        :type customer: Customer
+        :rtype: bool
+        """
+        if id(customer) not in self._expired:
+            return True
+        self._forget(customer)
+        self._dead -= 1
+        return False
+
+    def _forget(self, customer):
+        """
+        Record that one copy of the tracked customer left _content.
+
+        :type customer: Customer
+        :rtype: None
+        """
+        key = id(customer)
+        if self._copies[key] == 1:
+            del self._copies[key]
+            self._expired.discard(key)
+        else:
+            self._copies[key] -= 1
+
+    def _stored_customers(self):
+        """
+        Return an iterator over the customers in _content.
+
+        :rtype: Iterator[Customer]
+        """
+        return iter(self._content)
+
+    def _put(self, customer):
+        """
+        Store customer in _content.
+
+        :type customer: Customer
+        :rtype: None
+        """
+        raise NotImplementedError("This is an abstract class, define or"
+                                  " use its subclass")
+
+    def _take(self):
+        """
+        Remove and return the next customer stored in _content.
+
+        :rtype: Customer
+        """
+        raise NotImplementedError("This is an abstract class, define or"
+                                  " use its subclass")
+
+    def _keep_only(self, keep):
+        """
+        Rebuild _content with only the customers for which keep is True,
+        in the same order.
+
+        :type keep: Callable[[Customer], bool]
+        :rtype: None
+        """
+        raise NotImplementedError("This is an abstract class, define or"
+                                  " use its subclass")
+
+    def is_empty(self):
+        """
+        Return whether this waiting list is empty.
+
+        :rtype: bool
+        """
+        return len(self) == 0
+
+    def __len__(self):
+        """
+        Return the number of customers in this waiting list.
+
+        :rtype: int
+        """
+        return len(self._content) - self._dead
+
+
+class QueueWaitingList(WaitingList):
+    """A first-in, first-out WaitingList.
+
+    Customers are removed in the order they were added. Both add and remove
+    take O(1).
+    """
+
+    # === Private Attributes ===
+    # :type _content: deque
+    #   The waiting customers, earliest added on the left
+
+    def __init__(self):
+        """
+        Initialize an empty queue waiting list.
+
+        Extends WaitingList.__init__
+
+        >>> w = QueueWaitingList()
+        >>> w.add(3)
+        >>> w.add(5)
+        >>> w.remove()
+        3
+        """
+        super().__init__()
+        self._content = deque()
+
+    def _put(self, customer):
+        """
+        Add customer at the back of this waiting list.
+
+        Overrides WaitingList._put
+
+        :type customer: Customer
+        :rtype: None
+        """
+        self._content.append(customer)
+
+    def _take(self):
+        """
+        Remove and return the customer at the front of this waiting list.
+
+        Overrides WaitingList._take
+
+        :rtype: Customer
+        """
+        return self._content.popleft()
+
+    def _keep_only(self, keep):
+        """
+        Rebuild the queue with only the customers for which keep is True.
+
+        Overrides WaitingList._keep_only
+
+        :type keep: Callable[[Customer], bool]
+        :rtype: None
+        """
+        self._content = deque(filter(keep, self._content))
+
+
+class StackWaitingList(WaitingList):
+    """A last-in, first-out WaitingList.
+
+    The customer added last is removed first. Both add and remove take O(1).
+    """
+
+    def _put(self, customer):
+        """
+        Add customer on top of this waiting list.
+
+        Overrides WaitingList._put
+
+        :type customer: Customer
+        :rtype: None
+        """
+        self._content.append(customer)
+
+    def _take(self):
+        """
+        Remove and return the customer on top of this waiting list.
+
+        Overrides WaitingList._take
+
+        :rtype: Customer
+
+        >>> w = StackWaitingList()
+        >>> w.add(3)
+        >>> w.add(5)
+        >>> w.remove()
+        5
+        """
+        return self._content.pop()
+
+    def _keep_only(self, keep):
+        """
+        Rebuild the stack with only the customers for which keep is True.
+
+        Overrides WaitingList._keep_only
+
+        :type keep: Callable[[Customer], bool]
+        :rtype: None
+        """
+        self._content = list(filter(keep, self._content))
+
+
+class PriorityWaitingList(WaitingList):
+    """A WaitingList ordered by priority.
+
+    Customers are removed lowest priority value first. Customers with equal
+    priority are removed in the order they were added, which is the order a
+    linear scan over a plain list would find them, or newest first if asked.
+    Both add and remove take O(log n).
+    """
+
+    # === Private Attributes ===
+    # :type _content: List[(object, int, Customer)]
+    #   A binary heap of (priority, insertion number, customer)
+    # :type _priority: Callable[[Customer], object]
+    #   The function giving the priority of a customer
+    # :type _added: int
+    #   The number of customers added so far, used to break ties
+    # :type _newest_first: bool
+    #   Whether ties are broken newest first
+
+    def __init__(self, priority, newest_first=False):
+        """
+        Initialize an empty priority waiting list.
+
+        :param priority: a function giving the priority of a customer. It
+            should be defined at module level, or be a method, so the list
+            can be pickled.
+        :type priority: Callable[[Customer], object]
+        :param newest_first: Whether customers with equal priority are
+            removed newest first
+        :type newest_first: bool
+
+        >>> w = PriorityWaitingList(len)
+        >>> w.add("ccc")
+        >>> w.add("a")
+        >>> w.add("b")
+        >>> w.remove()
+        'a'
+        >>> w.remove()
+        'b'
+        >>> len(w)
+        1
+        """
+        super().__init__()
+        self._priority = priority
+        self._added = 0
+        self._newest_first = newest_first
+
+    def _put(self, customer):
+        """
+        Add customer to this waiting list.
+
+        Overrides WaitingList._put
+
+        :type customer: Customer
+        :rtype: None
+        """
+        tie = -self._added if self._newest_first else self._added
+        heapq.heappush(self._content,
+                       (self._priority(customer), tie, customer))
+        self._added += 1
+
+    def _stored_customers(self):
+        """
+        Return an iterator over the customers in the heap.
+
+        Overrides WaitingList._stored_customers
+
+        :rtype: Iterator[Customer]
+        """
+        return (entry[2] for entry in self._content)
+
+    def _take(self):
+        """
+        Remove and return the customer with the lowest priority value.
+
+        Overrides WaitingList._take
+
+        :rtype: Customer
+        """
+        return heapq.heappop(self._content)[2]
+
+    def _keep_only(self, keep):
+        """
+        Rebuild the heap with only the customers for which keep is True.
+
+        Overrides WaitingList._keep_only
+
+        :type keep: Callable[[Customer], bool]
+        :rtype: None
+        """
+        self._content = [entry for entry in self._content if keep(entry[2])]
+        heapq.heapify(self._content)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()